@@ -0,0 +1,40 @@
+"""
+JSON encode/decode helpers that use orjson when it is installed.
+
+orjson is optional; without it every helper falls back to the stdlib codec.
+Both decoders accept str or UTF-8 bytes and raise ValueError subclasses on
+malformed input, so callers can handle either codec the same way.
+"""
+import json
+from typing import Any
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; fall back to the stdlib codec
+    orjson = None
+
+
+if orjson is not None:
+    json_loads = orjson.loads
+
+    def json_dumps(obj: Any) -> str:
+        """Serialize obj to a JSON string"""
+        try:
+            return orjson.dumps(obj).decode()
+        except TypeError:  # e.g. integers beyond 64 bits, which json handles
+            return json.dumps(obj)
+
+else:
+    json_loads = json.loads
+    json_dumps = json.dumps
+
+
+def json_dumps_line(obj: Any) -> bytes:
+    """One newline-terminated JSON line as UTF-8 bytes, without insignificant whitespace"""
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_APPEND_NEWLINE)
+        except TypeError:  # e.g. integers beyond 64 bits, which json handles
+            pass
+    return (json.dumps(obj, separators=(",", ":"), ensure_ascii=False) + "\n").encode("utf-8")
+
@@ -3,6 +3,7 @@ Clean Terminal UI System
 Inspired by Claude Code's design principles
 """
 import logging
+import os
 from typing import Optional, Dict, Any
 from enum import Enum
 from rich.console import Console
@@ -28,6 +29,14 @@ class TerminalUI:
     
     def __init__(self):
         self.console = Console(file=sys.stdout, force_terminal=True)
+        # Callers building expensive debug strings can check this first;
+        # set CLAUDABLE_UI_DEBUG=0 to silence debug output
+        self.debug_enabled = os.getenv("CLAUDABLE_UI_DEBUG", "1").lower() not in (
+            "0",
+            "false",
+            "no",
+            "off",
+        )
         self._setup_colors()
     
     def _setup_colors(self):
@@ -63,7 +72,8 @@ class TerminalUI:
     
     def debug(self, message: str, component: Optional[str] = None):
         """Debug level message"""
-        self.log(message, LogLevel.DEBUG, component)
+        if self.debug_enabled:
+            self.log(message, LogLevel.DEBUG, component)
     
     def info(self, message: str, component: Optional[str] = None):
         """Info level message"""
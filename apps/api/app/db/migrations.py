@@ -1,24 +1,105 @@
 """Database migrations module for SQLite."""
 
+import json
 import logging
-from pathlib import Path
 from typing import Optional
 
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection, Engine
+
 logger = logging.getLogger(__name__)
 
 
-def run_sqlite_migrations(db_path: Optional[str] = None) -> None:
+# Columns added to existing tables after their initial release: (table, column, DDL type)
+_ADDITIVE_COLUMNS = [
+    ("projects", "codex_session_id", "VARCHAR(128)"),
+    ("projects", "codex_rollout_path", "VARCHAR(1024)"),
+]
+
+
+def run_sqlite_migrations(engine: Optional[Engine] = None) -> None:
     """
     Run SQLite database migrations.
-    
+
+    Only additive changes are handled: columns missing from existing tables
+    are added, followed by any one-time backfill they need.
+
     Args:
-        db_path: Path to the SQLite database file
+        engine: Engine bound to the application database
     """
-    if db_path:
-        logger.info(f"Running migrations for SQLite database at: {db_path}")
-    else:
-        logger.info("Running migrations for in-memory SQLite database")
-    
-    # Add migration logic here as needed
-    # For now, this is a placeholder that ensures the module exists
-    pass
\ No newline at end of file
+    if engine is None:
+        logger.info("No database engine provided; skipping migrations")
+        return
+
+    logger.info(f"Running migrations for database at: {engine.url}")
+
+    inspector = inspect(engine)
+    tables = set(inspector.get_table_names())
+    existing = {
+        table: {column["name"] for column in inspector.get_columns(table)}
+        for table in {table for table, _, _ in _ADDITIVE_COLUMNS}
+        if table in tables
+    }
+
+    added = set()
+    with engine.begin() as conn:
+        for table, column, ddl in _ADDITIVE_COLUMNS:
+            if table in existing and column not in existing[table]:
+                conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}"))
+                added.add(column)
+                logger.info(f"Added column {table}.{column}")
+
+        if "codex_session_id" in added:
+            _backfill_codex_session_columns(conn)
+
+
+def _backfill_codex_session_columns(conn: Connection) -> None:
+    """Move Codex session data out of the shared active_cursor_session_id blob.
+
+    Codex used to store {"codex": ..., "codex_rollout": ...} JSON in the
+    Cursor session column. Copy those keys into the dedicated columns and
+    write back whatever remains for the other CLIs.
+    """
+    rows = conn.execute(
+        text(
+            "SELECT id, active_cursor_session_id FROM projects "
+            "WHERE active_cursor_session_id LIKE '{%'"
+        )
+    ).fetchall()
+
+    migrated = 0
+    for project_id, raw in rows:
+        try:
+            data = json.loads(raw)
+        except ValueError:
+            continue
+        if not isinstance(data, dict) or not ({"codex", "codex_rollout"} & data.keys()):
+            continue
+
+        codex_session_id = data.pop("codex", None)
+        codex_rollout_path = data.pop("codex_rollout", None)
+        if not data:
+            remaining = None
+        elif data.keys() == {"cursor"}:
+            # Back to a plain Cursor session id, as the Cursor adapter expects
+            remaining = data["cursor"]
+        else:
+            remaining = json.dumps(data)
+
+        conn.execute(
+            text(
+                "UPDATE projects SET codex_session_id = :codex_session_id, "
+                "codex_rollout_path = :codex_rollout_path, "
+                "active_cursor_session_id = :remaining WHERE id = :id"
+            ),
+            {
+                "codex_session_id": codex_session_id,
+                "codex_rollout_path": codex_rollout_path,
+                "remaining": remaining,
+                "id": project_id,
+            },
+        )
+        migrated += 1
+
+    if migrated:
+        logger.info(f"Backfilled Codex session columns for {migrated} project(s)")
@@ -2,6 +2,7 @@ from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker
 from pathlib import Path
 from app.core.config import settings
+from app.core.json_codec import json_dumps
 
 # Ensure data directory exists
 db_path = settings.database_url.replace("sqlite:///", "")
@@ -15,7 +16,8 @@ if settings.database_url.startswith("sqlite"):
 engine = create_engine(
     settings.database_url, 
     connect_args=connect_args,
-    pool_pre_ping=True
+    pool_pre_ping=True,
+    json_serializer=json_dumps  # JSON columns such as Message.metadata_json
 )
 
 # Enable foreign key constraints for SQLite
@@ -20,6 +20,8 @@ class Project(Base):
     # Multi-CLI Session Management
     active_claude_session_id: Mapped[str | None] = mapped_column(String(128), nullable=True)  # Claude Code session ID
     active_cursor_session_id: Mapped[str | None] = mapped_column(String(128), nullable=True)  # Cursor Agent session ID
+    codex_session_id: Mapped[str | None] = mapped_column(String(128), nullable=True)  # Codex CLI session ID
+    codex_rollout_path: Mapped[str | None] = mapped_column(String(1024), nullable=True)  # Codex rollout file for resume
     
     # CLI Preferences
     preferred_cli: Mapped[str] = mapped_column(String(32), default="claude", nullable=False)  # claude, cursor
@@ -5,22 +5,102 @@ Moved from unified_manager.py to a dedicated adapter module.
 from __future__ import annotations
 
 import asyncio
+import itertools
 import json
 import os
 import subprocess
 import uuid
 from datetime import datetime
-from typing import Any, AsyncGenerator, Callable, Dict, List, Optional
+from typing import (
+    Any,
+    AsyncGenerator,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
 
 from app.core.terminal_ui import ui
 from app.models.messages import Message
+from app.models.projects import Project
 
-from ..base import BaseCLI, CLIType
+from ..base import (
+    BaseCLI,
+    CLIType,
+    env_flag,
+    get_project_id_from_path,
+    load_system_prompt,
+    utcnow,
+)
+
+# Where Codex writes its rollout-*.jsonl session transcripts
+CODEX_SESSIONS_DIR = os.path.join(os.path.expanduser("~"), ".codex", "sessions")
+
+# Seconds to wait for Codex to report session_configured after spawn
+SESSION_INIT_TIMEOUT = 10.0
+
+# Seconds to wait for Codex to exit after shutdown, then after SIGTERM
+PROCESS_EXIT_TIMEOUT = 5.0
+PROCESS_TERMINATE_TIMEOUT = 2.0
+
+AUTO_INSTRUCTIONS = (
+    "Act autonomously without asking for user confirmations. "
+    "Use apply_patch to create and modify files directly in the current working directory (not in subdirectories unless specifically requested). "
+    "Use exec_command to run, build, and test as needed. "
+    "Assume full permissions. Keep taking concrete actions until the task is complete. "
+    "Prefer concise status updates over questions. "
+    "Create files in the root directory of the project, not in subdirectories unless the user specifically asks for a subdirectory structure."
+)
+_INSTRUCTIONS_OVERRIDE = f"instructions={json.dumps(AUTO_INSTRUCTIONS)}"
+
+# Shutdown op with its newline terminator, encoded once
+_SHUTDOWN_OP = b'{"id":"shutdown","op":{"type":"shutdown"}}\n'
+
+
+def _encode_op(op: Dict[str, Any]) -> bytes:
+    """Encode a protocol op as one newline-terminated buffer for a single write()"""
+    return f"{json.dumps(op)}\n".encode("utf-8")
+
+
+# Fixed suffixes appended to app-generated project paths on every run
+_REPO_SUFFIX = os.sep + "repo"
+_AGENTS_MD_SUFFIX = os.sep + "AGENTS.md"
+
+
+# Assistant text buffered from deltas is flushed early past this many chars
+MAX_BUFFERED_MESSAGE_CHARS = 4 * 1024 * 1024
+
+# Shared default for events without a "msg" payload; never mutated
+_EMPTY_MSG: Dict[str, Any] = {}
+
+# Events delivered outside the current request id that must still be processed
+_SYSTEM_EVENT_TYPES = frozenset({"session_configured", "mcp_list_tools_response"})
+
+# Tool completion events - logged only, never shown to the user
+_TOOL_END_EVENT_TYPES = frozenset(
+    {"exec_command_end", "patch_apply_end", "mcp_tool_call_end"}
+)
 
 
 class CodexCLI(BaseCLI):
     """Codex CLI implementation with auto-approval and message buffering"""
 
+    # sessions root -> (directory signature, resolved root, rollout path,
+    # rollout (mtime_ns, size)) from the last full scan; shared across
+    # instances like the ACP clients
+    _ROLLOUT_CACHE: Dict[
+        str, Tuple[Tuple[int, ...], str, str, Tuple[int, int]]
+    ] = {}
+
+    # override_turn_context op pre-serialized around its per-call id
+    _APPROVAL_POLICY_TEMPLATE = (
+        b'{"id":"%b","op":{"type":"override_turn_context","approval_policy":"never",'
+        b'"sandbox_policy":{"mode":"danger-full-access"}}}\n'
+    )
+
     def __init__(self, db_session=None):
         super().__init__(CLIType.CODEX)
         self.db_session = db_session
@@ -32,8 +112,10 @@ class CodexCLI(BaseCLI):
         try:
             # Check if codex is installed and working
             print(f"[DEBUG] Running command: codex --version")
-            result = await asyncio.create_subprocess_shell(
-                "codex --version",
+            result = await asyncio.create_subprocess_exec(
+                "codex",
+                "--version",
+                stdin=asyncio.subprocess.DEVNULL,
                 stdout=asyncio.subprocess.PIPE,
                 stderr=asyncio.subprocess.PIPE,
             )
@@ -83,43 +165,37 @@ class CodexCLI(BaseCLI):
     ) -> AsyncGenerator[Message, None]:
         """Execute Codex CLI with auto-approval and message buffering"""
 
-        # Ensure AGENTS.md exists in project repo with system prompt (essential)
-        # If needed, set CLAUDABLE_DISABLE_AGENTS_MD=1 to skip.
-        try:
-            if str(os.getenv("CLAUDABLE_DISABLE_AGENTS_MD", "")).lower() in (
-                "1",
-                "true",
-                "yes",
-                "on",
-            ):
-                ui.debug("AGENTS.md auto-creation disabled by env", "Codex")
-            else:
-                await self._ensure_agent_md(project_path)
-        except Exception as _e:
-            ui.debug(f"AGENTS.md ensure failed (continuing): {_e}", "Codex")
+        # Message ids only need to be unique, so derive them from one uuid per
+        # run plus a counter instead of drawing a fresh uuid4 per Message
+        msg_id_prefix = uuid.uuid4().hex
+        msg_id_counter = itertools.count()
+
+        def next_message_id() -> str:
+            return f"{msg_id_prefix}{next(msg_id_counter):08x}"
 
         # Get CLI-specific model name
         cli_model = self._get_cli_model_name(model) or "gpt-5"
         ui.info(f"Starting Codex execution with model: {cli_model}", "Codex")
 
         # Get project ID for session management
-        project_id = project_path.split("/")[-1] if "/" in project_path else project_path
+        project_id = get_project_id_from_path(project_path)
 
         # Determine the repo path - Codex should run in repo directory
-        project_repo_path = os.path.join(project_path, "repo")
-        if not os.path.exists(project_repo_path):
-            project_repo_path = project_path  # Fallback to project_path if repo subdir doesn't exist
+        project_repo_path = self._resolve_repo_path(project_path)
+
+        # Ensure AGENTS.md exists in project repo with system prompt (essential)
+        # If needed, set CLAUDABLE_DISABLE_AGENTS_MD=1 to skip.
+        try:
+            if env_flag("CLAUDABLE_DISABLE_AGENTS_MD"):
+                ui.debug("AGENTS.md auto-creation disabled by env", "Codex")
+            else:
+                await self._ensure_agent_md(project_repo_path)
+        except Exception as _e:
+            if ui.debug_enabled:
+                ui.debug(f"AGENTS.md ensure failed (continuing): {_e}", "Codex")
 
         # Build Codex command - --cd must come BEFORE proto subcommand
         workdir_abs = os.path.abspath(project_repo_path)
-        auto_instructions = (
-            "Act autonomously without asking for user confirmations. "
-            "Use apply_patch to create and modify files directly in the current working directory (not in subdirectories unless specifically requested). "
-            "Use exec_command to run, build, and test as needed. "
-            "Assume full permissions. Keep taking concrete actions until the task is complete. "
-            "Prefer concise status updates over questions. "
-            "Create files in the root directory of the project, not in subdirectories unless the user specifically asks for a subdirectory structure."
-        )
 
         # Build base command with enhanced MCP and Sandbox support
         cmd = [
@@ -162,19 +238,11 @@ class CodexCLI(BaseCLI):
         if api_key:
             cmd.extend(["-c", f"api_key={api_key}"])
         
-        cmd.extend([
-            "-c",
-            f"instructions={json.dumps(auto_instructions)}",
-        ])
+        cmd.extend(["-c", _INSTRUCTIONS_OVERRIDE])
 
         # Optionally resume from a previous rollout. Disabled by default to avoid
         # stale system prompts or behaviors leaking between runs.
-        enable_resume = str(os.getenv("CLAUDABLE_CODEX_RESUME", "")).lower() in (
-            "1",
-            "true",
-            "yes",
-            "on",
-        )
+        enable_resume = env_flag("CLAUDABLE_CODEX_RESUME")
         if enable_resume:
             stored_rollout_path = await self.get_rollout_path(project_id)
             if stored_rollout_path and os.path.exists(stored_rollout_path):
@@ -184,7 +252,7 @@ class CodexCLI(BaseCLI):
                 )
             else:
                 # Try to find latest rollout file for this project
-                latest_rollout = self._find_latest_rollout_for_project(project_id)
+                latest_rollout = await self._find_latest_rollout_for_project(project_id)
                 if latest_rollout and os.path.exists(latest_rollout):
                     cmd.extend(["-c", f"experimental_resume={latest_rollout}"])
                     ui.info(
@@ -195,6 +263,7 @@ class CodexCLI(BaseCLI):
         else:
             ui.debug("Codex resume disabled (fresh session)", "Codex")
 
+        process: Optional[asyncio.subprocess.Process] = None
         try:
             # Start Codex process
             process = await asyncio.create_subprocess_exec(
@@ -206,65 +275,50 @@ class CodexCLI(BaseCLI):
             )
 
             # Message buffering
-            agent_message_buffer = ""
+            agent_message_parts: List[str] = []
+            agent_message_len = 0
             current_request_id = None
 
-            # Wait for session_configured
-            session_ready = False
-            timeout_count = 0
-            max_timeout = 100  # Max lines to read for session init
-
-            while not session_ready and timeout_count < max_timeout:
-                line = await process.stdout.readline()
-                if not line:
-                    break
-
-                line_str = line.decode().strip()
-                if not line_str:
-                    timeout_count += 1
-                    continue
+            # Wait for session_configured, bounded by wall-clock time rather than
+            # by the number of noise lines Codex happens to print first.
+            try:
+                init_event = await asyncio.wait_for(
+                    self._await_session_configured(process.stdout),
+                    timeout=SESSION_INIT_TIMEOUT,
+                )
+            except asyncio.TimeoutError:
+                init_event = None
 
-                try:
-                    event = json.loads(line_str)
-                    if event.get("msg", {}).get("type") == "session_configured":
-                        session_info = event["msg"]
-                        codex_session_id = session_info.get("session_id")
-                        if codex_session_id:
-                            await self.set_session_id(project_id, codex_session_id)
-
-                        ui.success(
-                            f"Codex session configured: {codex_session_id}", "Codex"
-                        )
+            if init_event is None:
+                ui.error("Failed to initialize Codex session", "Codex")
+                return
 
-                        # Send init message (hidden)
-                        yield Message(
-                            id=str(uuid.uuid4()),
-                            project_id=project_path,
-                            role="system",
-                            message_type="system",
-                            content=(
-                                f"🚀 Codex initialized (Model: {session_info.get('model', cli_model)})"
-                            ),
-                            metadata_json={
-                                "cli_type": self.cli_type.value,
-                                "hidden_from_ui": True,
-                            },
-                            session_id=session_id,
-                            created_at=datetime.utcnow(),
-                        )
+            session_info = init_event["msg"]
+            codex_session_id = session_info.get("session_id")
+            if codex_session_id:
+                await self.set_session_id(project_id, codex_session_id)
 
-                        # After initialization, set approval policy to auto-approve
-                        await self._set_codex_approval_policy(process, session_id or "")
+            ui.success(f"Codex session configured: {codex_session_id}", "Codex")
 
-                        session_ready = True
-                        break
-                except json.JSONDecodeError:
-                    timeout_count += 1
-                    continue
+            # Send init message (hidden)
+            yield Message(
+                id=next_message_id(),
+                project_id=project_path,
+                role="system",
+                message_type="system",
+                content=(
+                    f"🚀 Codex initialized (Model: {session_info.get('model', cli_model)})"
+                ),
+                metadata_json={
+                    "cli_type": self.cli_type.value,
+                    "hidden_from_ui": True,
+                },
+                session_id=session_id,
+                created_at=utcnow(),
+            )
 
-            if not session_ready:
-                ui.error("Failed to initialize Codex session", "Codex")
-                return
+            # After initialization, set approval policy to auto-approve
+            await self._set_codex_approval_policy(process, session_id or "")
 
             # Send user input
             request_id = f"msg_{uuid.uuid4().hex[:8]}"
@@ -381,12 +435,11 @@ Do not create subdirectories unless specifically requested by the user.
             user_input = {"id": request_id, "op": {"type": "user_input", "items": items}}
 
             if process.stdin:
-                json_str = json.dumps(user_input)
-                process.stdin.write(json_str.encode("utf-8") + b"\n")
+                process.stdin.write(_encode_op(user_input))
                 await process.stdin.drain()
 
                 # Log items being sent to agent
-                if images and len(items) > 1:
+                if ui.debug_enabled and images and len(items) > 1:
                     ui.debug(
                         f"Sending {len(items)} items to Codex (1 text + {len(items)-1} images)",
                         "Codex",
@@ -395,7 +448,8 @@ Do not create subdirectories unless specifically requested by the user.
                         if item.get("type") == "local_image":
                             ui.debug(f"  - Image: {item.get('path')}", "Codex")
 
-                ui.debug(f"Sent user input: {request_id}", "Codex")
+                if ui.debug_enabled:
+                    ui.debug(f"Sent user input: {request_id}", "Codex")
 
             # Process streaming events
             async for line in process.stdout:
@@ -405,270 +459,317 @@ Do not create subdirectories unless specifically requested by the user.
 
                 try:
                     event = json.loads(line_str)
-                    event_id = event.get("id", "")
-                    msg_type = event.get("msg", {}).get("type")
-
-                    # Only process events for current request (exclude system events)
-                    if (
-                        current_request_id
-                        and event_id != current_request_id
-                        and msg_type not in [
-                            "session_configured",
-                            "mcp_list_tools_response",
-                        ]
-                    ):
-                        continue
-
-                    # Buffer agent message deltas
-                    if msg_type == "agent_message_delta":
-                        agent_message_buffer += event["msg"]["delta"]
-                        continue
-
-                    # Only flush buffered assistant text on final assistant message or at task completion.
-                    # This avoids creating multiple assistant bubbles separated by tool events.
-                    if msg_type == "agent_message":
-                        # If Codex sent a final message without deltas, use it directly
-                        if not agent_message_buffer:
-                            try:
-                                final_msg = event.get("msg", {}).get("message")
-                                if isinstance(final_msg, str) and final_msg:
-                                    agent_message_buffer = final_msg
-                            except Exception:
-                                pass
-                        if not agent_message_buffer:
-                            # Nothing to flush
-                            continue
-                        yield Message(
-                            id=str(uuid.uuid4()),
-                            project_id=project_path,
-                            role="assistant",
-                            message_type="chat",
-                            content=agent_message_buffer,
-                            metadata_json={"cli_type": self.cli_type.value},
-                            session_id=session_id,
-                            created_at=datetime.utcnow(),
-                        )
-                        agent_message_buffer = ""
-
-                    # Handle specific events
-                    if msg_type == "exec_command_begin":
-                        cmd_str = " ".join(event["msg"]["command"])
-                        summary = self._create_tool_summary(
-                            "exec_command", {"command": cmd_str}
-                        )
-                        yield Message(
-                            id=str(uuid.uuid4()),
-                            project_id=project_path,
-                            role="assistant",
-                            message_type="tool_use",
-                            content=summary,
-                            metadata_json={
-                                "cli_type": self.cli_type.value,
-                                "tool_name": "Bash",
-                            },
-                            session_id=session_id,
-                            created_at=datetime.utcnow(),
-                        )
-
-                    elif msg_type == "patch_apply_begin":
-                        changes = event["msg"].get("changes", {})
-                        ui.debug(f"Patch apply begin - changes: {changes}", "Codex")
-                        summary = self._create_tool_summary(
-                            "apply_patch", {"changes": changes}
-                        )
-                        ui.debug(f"Generated summary: {summary}", "Codex")
-                        yield Message(
-                            id=str(uuid.uuid4()),
-                            project_id=project_path,
-                            role="assistant",
-                            message_type="tool_use",
-                            content=summary,
-                            metadata_json={
-                                "cli_type": self.cli_type.value,
-                                "tool_name": "Edit",
-                            },
-                            session_id=session_id,
-                            created_at=datetime.utcnow(),
-                        )
-
-                    elif msg_type == "web_search_begin":
-                        query = event["msg"].get("query", "")
-                        summary = self._create_tool_summary(
-                            "web_search", {"query": query}
-                        )
-                        yield Message(
-                            id=str(uuid.uuid4()),
-                            project_id=project_path,
-                            role="assistant",
-                            message_type="tool_use",
-                            content=summary,
-                            metadata_json={
-                                "cli_type": self.cli_type.value,
-                                "tool_name": "WebSearch",
-                            },
-                            session_id=session_id,
-                            created_at=datetime.utcnow(),
-                        )
-
-                    elif msg_type == "mcp_tool_call_begin":
-                        inv = event["msg"].get("invocation", {})
-                        server = inv.get("server")
-                        tool = inv.get("tool")
-                        summary = self._create_tool_summary(
-                            "mcp_tool_call", {"server": server, "tool": tool}
-                        )
-                        yield Message(
-                            id=str(uuid.uuid4()),
-                            project_id=project_path,
-                            role="assistant",
-                            message_type="tool_use",
-                            content=summary,
-                            metadata_json={
-                                "cli_type": self.cli_type.value,
-                                "tool_name": "MCPTool",
-                            },
-                            session_id=session_id,
-                            created_at=datetime.utcnow(),
-                        )
+                except ValueError:
+                    continue
 
-                    elif msg_type in ["exec_command_output_delta"]:
-                        # Output chunks from command execution - can be ignored for UI
-                        pass
+                event_id = event.get("id", "")
+                msg = event.get("msg") or _EMPTY_MSG
+                msg_type = msg.get("type")
 
-                    elif msg_type in [
-                        "exec_command_end",
-                        "patch_apply_end",
-                        "mcp_tool_call_end",
-                    ]:
-                        # Tool completion events - just log, don't show to user
-                        ui.debug(f"Tool completed: {msg_type}", "Codex")
+                # Only process events for current request (exclude system events)
+                if (
+                    current_request_id
+                    and event_id != current_request_id
+                    and msg_type not in _SYSTEM_EVENT_TYPES
+                ):
+                    continue
 
-                    elif msg_type == "task_complete":
-                        # Flush any remaining message buffer before completing
-                        if agent_message_buffer:
+                # Buffer agent message deltas
+                if msg_type == "agent_message_delta":
+                    delta = msg["delta"]
+                    if delta:
+                        agent_message_parts.append(delta)
+                        agent_message_len += len(delta)
+                        # Flush runaway streams early instead of buffering without bound
+                        if agent_message_len >= MAX_BUFFERED_MESSAGE_CHARS:
                             yield Message(
-                                id=str(uuid.uuid4()),
+                                id=next_message_id(),
                                 project_id=project_path,
                                 role="assistant",
                                 message_type="chat",
-                                content=agent_message_buffer,
+                                content="".join(agent_message_parts),
                                 metadata_json={"cli_type": self.cli_type.value},
                                 session_id=session_id,
-                                created_at=datetime.utcnow(),
+                                created_at=utcnow(),
                             )
-                            agent_message_buffer = ""
+                            agent_message_parts.clear()
+                            agent_message_len = 0
+                    continue
 
-                        # Task completion - save rollout file path for future resumption
-                        ui.success("Codex task completed", "Codex")
+                # Output chunks from command execution - can be ignored for UI
+                if msg_type == "exec_command_output_delta":
+                    continue
 
-                        # Find and store the latest rollout file for this session
-                        try:
-                            latest_rollout = self._find_latest_rollout_for_project(project_id)
-                            if latest_rollout:
-                                await self.set_rollout_path(project_id, latest_rollout)
-                                ui.debug(
-                                    f"Saved rollout path for future resumption: {latest_rollout}",
-                                    "Codex",
-                                )
-                        except Exception as e:
-                            ui.warning(f"Failed to save rollout path: {e}", "Codex")
+                # One timestamp for every Message produced by this event
+                now = utcnow()
+
+                # Tool start events map 1:1 to a tool_use Message
+                handler = self._TOOL_EVENT_HANDLERS.get(msg_type)
+                if handler is not None:
+                    summary, tool_name = handler(self, msg)
+                    yield self._tool_use_message(
+                        next_message_id(),
+                        summary,
+                        tool_name,
+                        project_path,
+                        session_id,
+                        now,
+                    )
+                    continue
 
-                        break
+                # Only flush buffered assistant text on final assistant message or at task completion.
+                # This avoids creating multiple assistant bubbles separated by tool events.
+                if msg_type == "agent_message":
+                    # If Codex sent a final message without deltas, use it directly
+                    if not agent_message_parts:
+                        final_msg = msg.get("message")
+                        if isinstance(final_msg, str) and final_msg:
+                            agent_message_parts.append(final_msg)
+                    if not agent_message_parts:
+                        # Nothing to flush
+                        continue
+                    yield Message(
+                        id=next_message_id(),
+                        project_id=project_path,
+                        role="assistant",
+                        message_type="chat",
+                        content="".join(agent_message_parts),
+                        metadata_json={"cli_type": self.cli_type.value},
+                        session_id=session_id,
+                        created_at=now,
+                    )
+                    agent_message_parts.clear()
+                    agent_message_len = 0
 
-                    elif msg_type == "error":
-                        error_msg = event["msg"]["message"]
-                        ui.error(f"Codex error: {error_msg}", "Codex")
+                elif msg_type in _TOOL_END_EVENT_TYPES:
+                    # Tool completion events - just log, don't show to user
+                    if ui.debug_enabled:
+                        ui.debug(f"Tool completed: {msg_type}", "Codex")
+
+                elif msg_type == "task_complete":
+                    # Flush any remaining message buffer before completing
+                    if agent_message_parts:
                         yield Message(
-                            id=str(uuid.uuid4()),
+                            id=next_message_id(),
                             project_id=project_path,
                             role="assistant",
-                            message_type="error",
-                            content=f"❌ Error: {error_msg}",
+                            message_type="chat",
+                            content="".join(agent_message_parts),
                             metadata_json={"cli_type": self.cli_type.value},
                             session_id=session_id,
-                            created_at=datetime.utcnow(),
+                            created_at=now,
                         )
+                        agent_message_parts.clear()
+                        agent_message_len = 0
 
-                    # Removed duplicate agent_message handler - already handled above
+                    # Task completion - save rollout file path for future resumption
+                    ui.success("Codex task completed", "Codex")
 
-                except json.JSONDecodeError:
-                    continue
+                    # Find and store the latest rollout file for this session
+                    try:
+                        latest_rollout = await self._find_latest_rollout_for_project(
+                            project_id
+                        )
+                        if latest_rollout and await self.set_rollout_path(
+                            project_id, latest_rollout
+                        ):
+                            if ui.debug_enabled:
+                                ui.debug(
+                                    f"Saved rollout path for future resumption: {latest_rollout}",
+                                    "Codex",
+                                )
+                    except Exception as e:
+                        ui.warning(f"Failed to save rollout path: {e}", "Codex")
+
+                    break
+
+                elif msg_type == "error":
+                    error_msg = msg["message"]
+                    ui.error(f"Codex error: {error_msg}", "Codex")
+                    yield Message(
+                        id=next_message_id(),
+                        project_id=project_path,
+                        role="assistant",
+                        message_type="error",
+                        content=f"❌ Error: {error_msg}",
+                        metadata_json={"cli_type": self.cli_type.value},
+                        session_id=session_id,
+                        created_at=now,
+                    )
 
             # Flush any remaining buffer
-            if agent_message_buffer:
+            if agent_message_parts:
                 yield Message(
-                    id=str(uuid.uuid4()),
+                    id=next_message_id(),
                     project_id=project_path,
                     role="assistant",
                     message_type="chat",
-                    content=agent_message_buffer,
+                    content="".join(agent_message_parts),
                     metadata_json={"cli_type": self.cli_type.value},
                     session_id=session_id,
-                    created_at=datetime.utcnow(),
+                    created_at=utcnow(),
                 )
 
-            # Clean shutdown
-            if process.stdin:
+            # Clean shutdown - write and close without a drain() round-trip,
+            # since Codex may already have exited; the finally block reaps it
+            stdin = process.stdin
+            if stdin is not None and not stdin.is_closing():
                 try:
-                    shutdown_cmd = {"id": "shutdown", "op": {"type": "shutdown"}}
-                    json_str = json.dumps(shutdown_cmd)
-                    process.stdin.write(json_str.encode("utf-8") + b"\n")
-                    await process.stdin.drain()
-                    process.stdin.close()
+                    stdin.write(_SHUTDOWN_OP)
+                    stdin.close()
                     ui.debug("Sent shutdown command to Codex", "Codex")
                 except Exception as e:
-                    ui.debug(f"Failed to send shutdown: {e}", "Codex")
-
-            await process.wait()
+                    if ui.debug_enabled:
+                        ui.debug(f"Failed to send shutdown: {e}", "Codex")
 
         except FileNotFoundError:
             yield Message(
-                id=str(uuid.uuid4()),
+                id=next_message_id(),
                 project_id=project_path,
                 role="assistant",
                 message_type="error",
                 content="❌ Codex CLI not found. Please install Codex CLI first.",
                 metadata_json={"error": "cli_not_found", "cli_type": "codex"},
                 session_id=session_id,
-                created_at=datetime.utcnow(),
+                created_at=utcnow(),
             )
         except Exception as e:
             yield Message(
-                id=str(uuid.uuid4()),
+                id=next_message_id(),
                 project_id=project_path,
                 role="assistant",
                 message_type="error",
                 content=f"❌ Codex execution failed: {str(e)}",
                 metadata_json={"error": "execution_failed", "cli_type": "codex"},
                 session_id=session_id,
-                created_at=datetime.utcnow(),
+                created_at=utcnow(),
             )
+        finally:
+            if process is not None:
+                await self._reap_process(process)
+
+    async def _reap_process(self, process: asyncio.subprocess.Process) -> None:
+        """Wait for Codex to exit, escalating to SIGTERM and then SIGKILL"""
+        if process.returncode is not None:
+            return
+        # EOF on stdin lets Codex exit on its own if it was never sent shutdown
+        if process.stdin is not None and not process.stdin.is_closing():
+            process.stdin.close()
+        try:
+            await asyncio.wait_for(process.wait(), timeout=PROCESS_EXIT_TIMEOUT)
+            return
+        except asyncio.TimeoutError:
+            ui.warning("Codex did not exit after shutdown, terminating", "Codex")
+        try:
+            process.terminate()
+            await asyncio.wait_for(process.wait(), timeout=PROCESS_TERMINATE_TIMEOUT)
+            return
+        except ProcessLookupError:
+            return
+        except asyncio.TimeoutError:
+            ui.warning("Codex ignored SIGTERM, killing", "Codex")
+        try:
+            process.kill()
+        except ProcessLookupError:
+            return
+        await process.wait()
+
+    def _tool_use_message(
+        self,
+        message_id: str,
+        summary: str,
+        tool_name: str,
+        project_path: str,
+        session_id: Optional[str],
+        created_at: datetime,
+    ) -> Message:
+        return Message(
+            id=message_id,
+            project_id=project_path,
+            role="assistant",
+            message_type="tool_use",
+            content=summary,
+            metadata_json={
+                "cli_type": self.cli_type.value,
+                "tool_name": tool_name,
+            },
+            session_id=session_id,
+            created_at=created_at,
+        )
+
+    def _handle_exec_command_begin(self, msg: Dict[str, Any]) -> Tuple[str, str]:
+        cmd_str = " ".join(msg["command"])
+        summary = self._create_tool_summary("exec_command", {"command": cmd_str})
+        return summary, "Bash"
+
+    def _handle_patch_apply_begin(self, msg: Dict[str, Any]) -> Tuple[str, str]:
+        changes = msg.get("changes", {})
+        if ui.debug_enabled:
+            ui.debug(f"Patch apply begin - changes: {changes}", "Codex")
+        summary = self._create_tool_summary("apply_patch", {"changes": changes})
+        if ui.debug_enabled:
+            ui.debug(f"Generated summary: {summary}", "Codex")
+        return summary, "Edit"
+
+    def _handle_web_search_begin(self, msg: Dict[str, Any]) -> Tuple[str, str]:
+        query = msg.get("query", "")
+        summary = self._create_tool_summary("web_search", {"query": query})
+        return summary, "WebSearch"
+
+    def _handle_mcp_tool_call_begin(self, msg: Dict[str, Any]) -> Tuple[str, str]:
+        inv = msg.get("invocation", {})
+        summary = self._create_tool_summary(
+            "mcp_tool_call", {"server": inv.get("server"), "tool": inv.get("tool")}
+        )
+        return summary, "MCPTool"
+
+    # msg_type -> handler returning (summary, tool_name) for the tool_use Message
+    _TOOL_EVENT_HANDLERS: Dict[str, Callable[..., Tuple[str, str]]] = {
+        "exec_command_begin": _handle_exec_command_begin,
+        "patch_apply_begin": _handle_patch_apply_begin,
+        "web_search_begin": _handle_web_search_begin,
+        "mcp_tool_call_begin": _handle_mcp_tool_call_begin,
+    }
+
+    async def _await_session_configured(
+        self, stdout: asyncio.StreamReader
+    ) -> Optional[Dict[str, Any]]:
+        """Read NDJSON events until session_configured; None if stdout closes first"""
+        async for line in stdout:
+            line_str = line.strip()
+            if not line_str:
+                continue
+            try:
+                event = json.loads(line_str)
+            except ValueError:
+                continue
+            if (event.get("msg") or _EMPTY_MSG).get("type") == "session_configured":
+                return event
+        return None
+
+    def _get_project(self, project: Union[Project, str]) -> Optional[Project]:
+        """Resolve a project id to its row; rows passed in are used as-is.
+
+        Lookups go through Session.get, so ids already loaded in this session
+        are served from the identity map without SQL.
+        """
+        if not isinstance(project, str):
+            return project
+        return self.db_session.get(Project, project)
 
     async def get_session_id(self, project_id: str) -> Optional[str]:
         """Get stored session ID for project"""
         # Try to get from database first
         if self.db_session:
             try:
-                from app.models.projects import Project
-
-                project = (
-                    self.db_session.query(Project)
-                    .filter(Project.id == project_id)
-                    .first()
-                )
-                if project and project.active_cursor_session_id:
-                    # Parse JSON data that might contain codex session info
-                    try:
-                        session_data = json.loads(project.active_cursor_session_id)
-                        if isinstance(session_data, dict) and "codex" in session_data:
-                            codex_session = session_data["codex"]
-                            ui.debug(
-                                f"Retrieved Codex session from DB: {codex_session}", "Codex"
-                            )
-                            return codex_session
-                    except (json.JSONDecodeError, TypeError):
-                        # If it's not JSON, might be a plain cursor session ID
-                        pass
+                project = self._get_project(project_id)
+                if project and project.codex_session_id:
+                    codex_session = project.codex_session_id
+                    if ui.debug_enabled:
+                        ui.debug(
+                            f"Retrieved Codex session from DB: {codex_session}", "Codex"
+                        )
+                    return codex_session
             except Exception as e:
                 ui.warning(f"Failed to get Codex session from DB: {e}", "Codex")
 
@@ -680,206 +781,228 @@ Do not create subdirectories unless specifically requested by the user.
         # Store in database
         if self.db_session:
             try:
-                from app.models.projects import Project
-
-                project = (
-                    self.db_session.query(Project)
-                    .filter(Project.id == project_id)
-                    .first()
-                )
-                if project:
-                    # Try to parse existing session data
-                    existing_data: Dict[str, Any] = {}
-                    if project.active_cursor_session_id:
-                        try:
-                            existing_data = json.loads(project.active_cursor_session_id)
-                            if not isinstance(existing_data, dict):
-                                # If it's a plain string, preserve it as cursor session
-                                existing_data = {
-                                    "cursor": project.active_cursor_session_id
-                                }
-                        except (json.JSONDecodeError, TypeError):
-                            existing_data = {"cursor": project.active_cursor_session_id}
-
-                    # Add/update codex session
-                    existing_data["codex"] = session_id
-
-                    # Save back to database
-                    project.active_cursor_session_id = json.dumps(existing_data)
-                    self.db_session.commit()
-                    ui.debug(
-                        f"Codex session saved to DB for project {project_id}: {session_id}",
-                        "Codex",
-                    )
+                await self._update_session_data(project_id, codex_session_id=session_id)
             except Exception as e:
                 ui.error(f"Failed to save Codex session to DB: {e}", "Codex")
 
         # Store in memory as fallback
         self._session_store[project_id] = session_id
-        ui.debug(
-            f"Codex session stored in memory for project {project_id}: {session_id}",
-            "Codex",
-        )
+        if ui.debug_enabled:
+            ui.debug(
+                f"Codex session stored in memory for project {project_id}: {session_id}",
+                "Codex",
+            )
 
     async def get_rollout_path(self, project_id: str) -> Optional[str]:
         """Get stored rollout file path for project"""
         if self.db_session:
             try:
-                from app.models.projects import Project
-
-                project = (
-                    self.db_session.query(Project)
-                    .filter(Project.id == project_id)
-                    .first()
-                )
-                if project and project.active_cursor_session_id:
-                    try:
-                        session_data = json.loads(project.active_cursor_session_id)
-                        if (
-                            isinstance(session_data, dict)
-                            and "codex_rollout" in session_data
-                        ):
-                            rollout_path = session_data["codex_rollout"]
-                            ui.debug(
-                                f"Retrieved Codex rollout path from DB: {rollout_path}",
-                                "Codex",
-                            )
-                            return rollout_path
-                    except (json.JSONDecodeError, TypeError):
-                        pass
+                project = self._get_project(project_id)
+                if project and project.codex_rollout_path:
+                    rollout_path = project.codex_rollout_path
+                    if ui.debug_enabled:
+                        ui.debug(
+                            f"Retrieved Codex rollout path from DB: {rollout_path}",
+                            "Codex",
+                        )
+                    return rollout_path
             except Exception as e:
                 ui.warning(f"Failed to get Codex rollout path from DB: {e}", "Codex")
         return None
 
-    async def set_rollout_path(self, project_id: str, rollout_path: str) -> None:
-        """Store rollout file path for project"""
+    async def set_rollout_path(
+        self, project: Union[Project, str], rollout_path: str
+    ) -> bool:
+        """Store rollout file path for a project row or project id.
+
+        Returns True only when the stored path actually changed.
+        """
         if self.db_session:
             try:
-                from app.models.projects import Project
-
-                project = (
-                    self.db_session.query(Project)
-                    .filter(Project.id == project_id)
-                    .first()
+                return await self._update_session_data(
+                    project, codex_rollout_path=rollout_path
                 )
-                if project:
-                    # Try to parse existing session data
-                    existing_data: Dict[str, Any] = {}
-                    if project.active_cursor_session_id:
-                        try:
-                            existing_data = json.loads(project.active_cursor_session_id)
-                            if not isinstance(existing_data, dict):
-                                existing_data = {
-                                    "cursor": project.active_cursor_session_id
-                                }
-                        except (json.JSONDecodeError, TypeError):
-                            existing_data = {"cursor": project.active_cursor_session_id}
-
-                    # Add/update rollout path
-                    existing_data["codex_rollout"] = rollout_path
-
-                    # Save back to database
-                    project.active_cursor_session_id = json.dumps(existing_data)
-                    self.db_session.commit()
-                    ui.debug(
-                        f"Codex rollout path saved to DB for project {project_id}: {rollout_path}",
-                        "Codex",
-                    )
             except Exception as e:
                 ui.error(f"Failed to save Codex rollout path to DB: {e}", "Codex")
+        return False
+
+    async def _update_session_data(
+        self, project: Union[Project, str], **updates: Any
+    ) -> bool:
+        """Set Codex session columns on a project with a single commit.
+
+        Unchanged values are skipped, so the row is only rewritten when at
+        least one column actually differs. Returns whether a commit happened.
+        """
+        project = self._get_project(project)
+        if not project:
+            return False
+        if all(getattr(project, key) == value for key, value in updates.items()):
+            return False
+
+        for key, value in updates.items():
+            setattr(project, key, value)
+        self.db_session.commit()
+        if ui.debug_enabled:
+            ui.debug(
+                f"Codex session data saved to DB for project {project.id}: {updates}",
+                "Codex",
+            )
+        return True
+
+    def _rollout_dir_signature(
+        self, rollout_path: str, root: str
+    ) -> Optional[Tuple[int, ...]]:
+        """Directory mtimes from a rollout's folder up to the sessions root.
+
+        Codex shards rollouts by date, so creating a newer rollout adds an
+        entry to one of these directories; an unchanged signature means no new
+        rollout file appeared. Appending to an existing rollout leaves these
+        untouched, which _rollout_file_stamp covers for the cached winner.
+        Returns None when any directory can't be stat'ed.
+        """
+        signature: List[int] = []
+        current = os.path.dirname(rollout_path)
+        try:
+            while True:
+                signature.append(os.stat(current).st_mtime_ns)
+                parent = os.path.dirname(current)
+                if current == root or parent == current:
+                    break
+                current = parent
+        except OSError:
+            return None
+        return tuple(signature)
 
-    def _find_latest_rollout_for_project(self, project_id: str) -> Optional[str]:
-        """Find the latest rollout file using codex_chat.py logic"""
+    @staticmethod
+    def _rollout_file_stamp(rollout_path: str) -> Optional[Tuple[int, int]]:
+        """(mtime_ns, size) of a rollout file, or None when it can't be stat'ed"""
         try:
-            from pathlib import Path
+            st = os.stat(rollout_path)
+        except OSError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    @staticmethod
+    def _iter_rollouts(root: str) -> Iterator[Tuple[float, str]]:
+        """Yield (mtime, path) for every rollout-*.jsonl below root.
 
+        Walks with os.scandir so directory entries carry their type and the
+        only per-file syscall is the stat of actual rollout files.
+        """
+        stack = [root]
+        while stack:
+            try:
+                with os.scandir(stack.pop()) as entries:
+                    for entry in entries:
+                        name = entry.name
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+                        elif (
+                            name.startswith("rollout-")
+                            and name.endswith(".jsonl")
+                            and entry.is_file(follow_symlinks=False)
+                        ):
+                            yield entry.stat(follow_symlinks=False).st_mtime, entry.path
+            except OSError:
+                continue
+
+    async def _find_latest_rollout_for_project(self, project_id: str) -> Optional[str]:
+        """Find the latest rollout file, walking the sessions tree off the event loop"""
+        # Reuse the previous scan while no rollout has been created and the
+        # winner itself is unchanged; this costs a few stat() calls, so it
+        # stays on the event loop
+        cached = CodexCLI._ROLLOUT_CACHE.get(CODEX_SESSIONS_DIR)
+        if cached is not None:
+            signature, root, rollout_path, stamp = cached
+            if (
+                self._rollout_file_stamp(rollout_path) == stamp
+                and self._rollout_dir_signature(rollout_path, root) == signature
+            ):
+                return rollout_path
+
+        return await asyncio.to_thread(self._find_latest_rollout_sync, project_id)
+
+    def _find_latest_rollout_sync(self, project_id: str) -> Optional[str]:
+        """Find the latest rollout file using codex_chat.py logic"""
+        try:
             # Use exact same logic as codex_chat.py _resolve_resume_path for "latest"
-            root = Path.home() / ".codex" / "sessions"
-            if not root.exists():
-                ui.debug(
-                    f"Codex sessions directory does not exist: {root}", "Codex"
-                )
+            # Resolve symlinks once on the root; the walk never follows links,
+            # so every rollout path found below it is already canonical
+            root = os.path.realpath(CODEX_SESSIONS_DIR)
+            if not os.path.isdir(root):
+                if ui.debug_enabled:
+                    ui.debug(
+                        f"Codex sessions directory does not exist: {root}", "Codex"
+                    )
                 return None
 
-            # Find all rollout files using same pattern as codex_chat.py
-            candidates = sorted(
-                root.rglob("rollout-*.jsonl"),
-                key=lambda p: p.stat().st_mtime,
-                reverse=True,  # Most recent first
-            )
-
-            if not candidates:
-                ui.debug(f"No rollout files found in {root}", "Codex")
+            # Single pass keeping the most recent file instead of sorting them all
+            latest = max(self._iter_rollouts(root), default=None)
+            if latest is None:
+                if ui.debug_enabled:
+                    ui.debug(f"No rollout files found in {root}", "Codex")
                 return None
 
-            # Return the most recent file (same as codex_chat.py "latest" logic)
-            latest_file = candidates[0]
-            rollout_path = str(latest_file.resolve())
+            rollout_path = latest[1]
+            signature = self._rollout_dir_signature(rollout_path, root)
+            stamp = self._rollout_file_stamp(rollout_path)
+            if signature is not None and stamp is not None:
+                CodexCLI._ROLLOUT_CACHE[CODEX_SESSIONS_DIR] = (
+                    signature,
+                    root,
+                    rollout_path,
+                    stamp,
+                )
 
-            ui.debug(
-                f"Found latest rollout file for project {project_id}: {rollout_path}",
-                "Codex",
-            )
+            if ui.debug_enabled:
+                ui.debug(
+                    f"Found latest rollout file for project {project_id}: {rollout_path}",
+                    "Codex",
+                )
             return rollout_path
         except Exception as e:
             ui.warning(f"Failed to find latest rollout file: {e}", "Codex")
             return None
 
-    async def _ensure_agent_md(self, project_path: str) -> None:
+    @staticmethod
+    def _resolve_repo_path(project_path: str) -> str:
+        """The project's repo/ subdirectory, or project_path when there is none"""
+        repo_path = project_path + _REPO_SUFFIX
+        return repo_path if os.path.isdir(repo_path) else project_path
+
+    async def _ensure_agent_md(self, project_repo_path: str) -> None:
         """Ensure AGENTS.md exists in project repo with system prompt"""
-        # Determine the repo path
-        project_repo_path = os.path.join(project_path, "repo")
-        if not os.path.exists(project_repo_path):
-            project_repo_path = project_path
+        agent_md_path = project_repo_path + _AGENTS_MD_SUFFIX
 
-        agent_md_path = os.path.join(project_repo_path, "AGENTS.md")
+        try:
+            system_prompt_content = load_system_prompt()
+            if system_prompt_content is None:
+                return
 
-        # Check if AGENTS.md already exists
-        if os.path.exists(agent_md_path):
-            ui.debug(f"AGENTS.md already exists at: {agent_md_path}", "Codex")
-            return
+            # Create-or-skip in one syscall instead of exists() then open()
+            try:
+                fd = os.open(agent_md_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644)
+            except FileExistsError:
+                if ui.debug_enabled:
+                    ui.debug(f"AGENTS.md already exists at: {agent_md_path}", "Codex")
+                return
 
-        try:
-            # Read system prompt from the source file using relative path
-            current_file_dir = os.path.dirname(os.path.abspath(__file__))
-            # this file is in: app/services/cli/adapters/
-            # go up to app/: adapters -> cli -> services -> app
-            app_dir = os.path.abspath(os.path.join(current_file_dir, "..", "..", ".."))
-            system_prompt_path = os.path.join(app_dir, "prompt", "system-prompt.md")
-
-            if os.path.exists(system_prompt_path):
-                with open(system_prompt_path, "r", encoding="utf-8") as f:
-                    system_prompt_content = f.read()
-
-                # Write to AGENTS.md in the project repo
-                with open(agent_md_path, "w", encoding="utf-8") as f:
-                    f.write(system_prompt_content)
-
-                ui.success(f"Created AGENTS.md at: {agent_md_path}", "Codex")
-            else:
-                ui.warning(
-                    f"System prompt file not found at: {system_prompt_path}",
-                    "Codex",
-                )
+            # Write to AGENTS.md in the project repo as raw bytes, no transcoding
+            with os.fdopen(fd, "wb") as f:
+                f.write(system_prompt_content)
+
+            ui.success(f"Created AGENTS.md at: {agent_md_path}", "Codex")
         except Exception as e:
             ui.error(f"Failed to create AGENTS.md: {e}", "Codex")
 
     async def _set_codex_approval_policy(self, process, session_id: str):
         """Set Codex approval policy to never (full-auto mode)"""
         try:
-            ctl_id = f"ctl_{uuid.uuid4().hex[:8]}"
-            payload = {
-                "id": ctl_id,
-                "op": {
-                    "type": "override_turn_context",
-                    "approval_policy": "never",
-                    "sandbox_policy": {"mode": "danger-full-access"},
-                },
-            }
+            ctl_id = "ctl_" + os.urandom(4).hex()
 
             if process.stdin:
-                json_str = json.dumps(payload)
-                process.stdin.write(json_str.encode("utf-8") + b"\n")
+                process.stdin.write(self._APPROVAL_POLICY_TEMPLATE % ctl_id.encode())
                 await process.stdin.drain()
                 ui.success("Codex approval policy set to auto-approve", "Codex")
         except Exception as e:
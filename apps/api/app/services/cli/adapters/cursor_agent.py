@@ -5,25 +5,98 @@ Moved from unified_manager.py to a dedicated adapter module.
 from __future__ import annotations
 
 import asyncio
-import json
 import os
 import uuid
 from datetime import datetime
-from typing import Any, AsyncGenerator, Callable, Dict, List, Optional
+from typing import Any, AsyncGenerator, Callable, Dict, List, Optional, Set
 
 from app.models.messages import Message
+from app.models.projects import Project
+from app.core.json_codec import json_dumps, json_loads
 from app.core.terminal_ui import ui
 
-from ..base import BaseCLI, CLIType
+from ..base import (
+    BaseCLI,
+    CLIType,
+    env_flag,
+    get_project_id_from_path,
+    load_system_prompt,
+    utcnow,
+)
+
+# StreamReader line limit for cursor-agent stdout; tool_call events carrying
+# file contents or diffs routinely exceed asyncio's 64 KiB default
+STREAM_LINE_LIMIT = 4 * 1024 * 1024
+
+# Seconds to wait for cursor-agent to exit after its stdout closes, then after SIGTERM
+PROCESS_EXIT_TIMEOUT = 5.0
+PROCESS_TERMINATE_TIMEOUT = 2.0
+
+# Lines read ahead of the consumer before the stdout reader task waits
+STREAM_QUEUE_SIZE = 64
+
+# stderr is drained in raw chunks of this size, so long lines can't overrun
+STDERR_CHUNK_SIZE = 64 * 1024
+
+# Queued by the stdout reader task once cursor-agent closes its stdout
+_STREAM_DONE = object()
+
+
+# Raw tool_call keys (lsToolCall, editToolCall, ...) -> normalized tool names
+_TOOL_NAME_CACHE: Dict[str, str] = {}
+
+# Keys that may carry the Cursor session id, in lookup order
+_SESSION_ID_KEYS = ("sessionId", "chatId", "session_id", "chat_id", "threadId", "thread_id")
+_MESSAGE_SESSION_ID_KEYS = _SESSION_ID_KEYS[:4]
+
+
+def _first_present(data: Dict[str, Any], keys: tuple) -> Optional[Any]:
+    """Return the first truthy value stored under one of keys, probing each once"""
+    for key in keys:
+        value = data.get(key)
+        if value:
+            return value
+    return None
 
 
 class CursorAgentCLI(BaseCLI):
     """Cursor Agent CLI implementation with stream-json support and session continuity"""
 
+    # Repo paths already known to contain AGENTS.md, shared across instances
+    _AGENTS_MD_READY: Set[str] = set()
+
     def __init__(self, db_session=None):
         super().__init__(CLIType.CURSOR)
         self.db_session = db_session
         self._session_store = {}  # Fallback for when db_session is not available
+        self._cli_type_value = self.cli_type.value
+        # CURSOR_MODEL is read once; mapped model names are memoised per instance
+        self._env_cursor_model = os.getenv("CURSOR_MODEL")
+        self._env_api_key = os.getenv("CURSOR_API_KEY")
+        self._cli_model_cache: Dict[str, Optional[str]] = {}
+
+    def _make_message(
+        self,
+        *,
+        project_id: str,
+        role: str,
+        message_type: str,
+        content: str,
+        metadata: Dict[str, Any],
+        session_id: Optional[str],
+        created_at: Optional[datetime] = None,
+    ) -> Message:
+        """Build a Message with a hex uuid id; created_at defaults to now"""
+        return Message(
+            id=uuid.uuid4().hex,
+            project_id=project_id,
+            role=role,
+            message_type=message_type,
+            content=content,
+            metadata_json=metadata,
+            session_id=session_id,
+            created_at=created_at or utcnow(),
+        )
 
     async def check_availability(self) -> Dict[str, Any]:
         """Check if Cursor Agent CLI is available"""
@@ -78,183 +151,293 @@ class CursorAgentCLI(BaseCLI):
             }
 
     def _handle_cursor_stream_json(
-        self, event: Dict[str, Any], project_path: str, session_id: str
+        self,
+        event: Dict[str, Any],
+        project_path: str,
+        session_id: str,
+        now: Optional[datetime] = None,
     ) -> Optional[Message]:
         """Handle Cursor stream-json format (NDJSON events) to be compatible with Claude Code CLI output"""
-        event_type = event.get("type")
-
-        if event_type == "system":
-            # System initialization event
-            return Message(
-                id=str(uuid.uuid4()),
-                project_id=project_path,
-                role="system",
-                message_type="system",
-                content=f"🔧 Cursor Agent initialized (Model: {event.get('model', 'unknown')})",
-                metadata_json={
-                    "cli_type": self.cli_type.value,
-                    "event_type": "system",
-                    "cwd": event.get("cwd"),
-                    "api_key_source": event.get("apiKeySource"),
-                    "original_event": event,
-                    "hidden_from_ui": True,  # Hide system init messages
-                },
-                session_id=session_id,
-                created_at=datetime.utcnow(),
-            )
+        # "user" events have no handler: Cursor echoes back the user's prompt and
+        # it is suppressed to avoid duplicates
+        handler = self._EVENT_HANDLERS.get(event.get("type"))
+        if handler is None:
+            return None
+        return handler(self, event, project_path, session_id, now)
 
-        elif event_type == "user":
-            # Cursor echoes back the user's prompt. Suppress it to avoid duplicates.
+    def _handle_system(
+        self,
+        event: Dict[str, Any],
+        project_path: str,
+        session_id: str,
+        now: Optional[datetime],
+    ) -> Optional[Message]:
+        # System initialization event; hidden from the UI, so it can be skipped
+        if env_flag("CURSOR_SKIP_HIDDEN_EVENTS"):
             return None
+        metadata = {
+            "cli_type": self._cli_type_value,
+            "event_type": "system",
+            "cwd": event.get("cwd"),
+            "api_key_source": event.get("apiKeySource"),
+            "hidden_from_ui": True,  # Hide system init messages
+        }
+        self._attach_raw_event(metadata, "original_event", event)
+        return self._make_message(
+            project_id=project_path,
+            role="system",
+            message_type="system",
+            content=f"🔧 Cursor Agent initialized (Model: {event.get('model', 'unknown')})",
+            metadata=metadata,
+            session_id=session_id,
+            created_at=now,
+        )
 
-        elif event_type == "assistant":
-            # Assistant response event (text delta)
-            message_content = event.get("message", {}).get("content", [])
-            content = ""
+    def _handle_assistant(
+        self,
+        event: Dict[str, Any],
+        project_path: str,
+        session_id: str,
+        now: Optional[datetime],
+    ) -> Optional[Message]:
+        # Assistant response event (text delta)
+        message_content = event.get("message", {}).get("content", [])
+        content = ""
 
-            if message_content and isinstance(message_content, list):
-                for part in message_content:
-                    if part.get("type") == "text":
-                        content += part.get("text", "")
+        if message_content and isinstance(message_content, list):
+            for part in message_content:
+                if part.get("type") == "text":
+                    content += part.get("text", "")
 
-            if content:
-                return Message(
-                    id=str(uuid.uuid4()),
-                    project_id=project_path,
-                    role="assistant",
-                    message_type="chat",
-                    content=content,
-                    metadata_json={
-                        "cli_type": self.cli_type.value,
-                        "event_type": "assistant",
-                        "original_event": event,
-                    },
-                    session_id=session_id,
-                    created_at=datetime.utcnow(),
-                )
-
-        elif event_type == "tool_call":
-            subtype = event.get("subtype")
-            tool_call_data = event.get("tool_call", {})
-            if not tool_call_data:
-                return None
+        if not content:
+            return None
+        metadata = {
+            "cli_type": self._cli_type_value,
+            "event_type": "assistant",
+        }
+        self._attach_raw_event(metadata, "original_event", event)
+        return self._make_message(
+            project_id=project_path,
+            role="assistant",
+            message_type="chat",
+            content=content,
+            metadata=metadata,
+            session_id=session_id,
+            created_at=now,
+        )
 
-            tool_name_raw = next(iter(tool_call_data), None)
-            if not tool_name_raw:
-                return None
+    def _handle_tool_call(
+        self,
+        event: Dict[str, Any],
+        project_path: str,
+        session_id: str,
+        now: Optional[datetime],
+    ) -> Optional[Message]:
+        handler = self._TOOL_CALL_HANDLERS.get(event.get("subtype"))
+        if handler is None:
+            return None
 
-            # Normalize tool name: lsToolCall -> ls
-            tool_name = tool_name_raw.replace("ToolCall", "")
+        tool_call_data = event.get("tool_call", {})
+        if not tool_call_data:
+            return None
 
-            if subtype == "started":
-                tool_input = tool_call_data[tool_name_raw].get("args", {})
-                summary = self._create_tool_summary(tool_name, tool_input)
+        tool_name_raw = next(iter(tool_call_data), None)
+        if not tool_name_raw:
+            return None
 
-                return Message(
-                    id=str(uuid.uuid4()),
-                    project_id=project_path,
-                    role="assistant",
-                    message_type="chat",
-                    content=summary,
-                    metadata_json={
-                        "cli_type": self.cli_type.value,
-                        "event_type": "tool_call_started",
-                        "tool_name": tool_name,
-                        "tool_input": tool_input,
-                        "original_event": event,
-                    },
-                    session_id=session_id,
-                    created_at=datetime.utcnow(),
-                )
+        # Normalize tool name: lsToolCall -> ls; the set of names is small, so
+        # each is normalized once per process
+        tool_name = _TOOL_NAME_CACHE.get(tool_name_raw)
+        if tool_name is None:
+            tool_name = _TOOL_NAME_CACHE[tool_name_raw] = tool_name_raw.replace(
+                "ToolCall", ""
+            )
 
-            elif subtype == "completed":
-                result = tool_call_data[tool_name_raw].get("result", {})
-                content = ""
-                if "success" in result:
-                    content = json.dumps(result["success"])
-                elif "error" in result:
-                    content = json.dumps(result["error"])
+        return handler(
+            self,
+            event,
+            tool_name,
+            tool_call_data[tool_name_raw],
+            project_path,
+            session_id,
+            now,
+        )
 
-                return Message(
-                    id=str(uuid.uuid4()),
-                    project_id=project_path,
-                    role="system",
-                    message_type="tool_result",
-                    content=content,
-                    metadata_json={
-                        "cli_type": self.cli_type.value,
-                        "original_format": event,
-                        "tool_name": tool_name,
-                        "hidden_from_ui": True,
-                    },
-                    session_id=session_id,
-                    created_at=datetime.utcnow(),
-                )
+    def _handle_tool_call_started(
+        self,
+        event: Dict[str, Any],
+        tool_name: str,
+        tool_data: Dict[str, Any],
+        project_path: str,
+        session_id: str,
+        now: Optional[datetime],
+    ) -> Message:
+        tool_input = tool_data.get("args", {})
+        summary = self._create_tool_summary(tool_name, tool_input)
+
+        metadata = {
+            "cli_type": self._cli_type_value,
+            "event_type": "tool_call_started",
+            "tool_name": tool_name,
+            "tool_input": tool_input,
+        }
+        self._attach_raw_event(metadata, "original_event", event)
+        return self._make_message(
+            project_id=project_path,
+            role="assistant",
+            message_type="chat",
+            content=summary,
+            metadata=metadata,
+            session_id=session_id,
+            created_at=now,
+        )
 
-        elif event_type == "result":
-            # Final result event
-            duration = event.get("duration_ms", 0)
-            result_text = event.get("result", "")
+    def _handle_tool_call_completed(
+        self,
+        event: Dict[str, Any],
+        tool_name: str,
+        tool_data: Dict[str, Any],
+        project_path: str,
+        session_id: str,
+        now: Optional[datetime],
+    ) -> Optional[Message]:
+        # Tool results are hidden from the UI, so they can be skipped
+        if env_flag("CURSOR_SKIP_HIDDEN_EVENTS"):
+            return None
+        result = tool_data.get("result", {})
+        content = ""
+        if "success" in result:
+            content = json_dumps(result["success"])
+        elif "error" in result:
+            content = json_dumps(result["error"])
+
+        metadata = {
+            "cli_type": self._cli_type_value,
+            "tool_name": tool_name,
+            "hidden_from_ui": True,
+        }
+        self._attach_raw_event(metadata, "original_format", event)
+        return self._make_message(
+            project_id=project_path,
+            role="system",
+            message_type="tool_result",
+            content=content,
+            metadata=metadata,
+            session_id=session_id,
+            created_at=now,
+        )
 
-            if result_text:
-                return Message(
-                    id=str(uuid.uuid4()),
-                    project_id=project_path,
-                    role="system",
-                    message_type="system",
-                    content=(
-                        f"Execution completed in {duration}ms. Final result: {result_text}"
-                    ),
-                    metadata_json={
-                        "cli_type": self.cli_type.value,
-                        "event_type": "result",
-                        "duration_ms": duration,
-                        "original_event": event,
-                        "hidden_from_ui": True,
-                    },
-                    session_id=session_id,
-                    created_at=datetime.utcnow(),
-                )
+    def _handle_result(
+        self,
+        event: Dict[str, Any],
+        project_path: str,
+        session_id: str,
+        now: Optional[datetime],
+    ) -> Optional[Message]:
+        # Final result event
+        duration = event.get("duration_ms", 0)
+        result_text = event.get("result", "")
 
-        return None
+        if not result_text:
+            return None
+        metadata = {
+            "cli_type": self._cli_type_value,
+            "event_type": "result",
+            "duration_ms": duration,
+            # Read by the CLI manager to decide whether the run succeeded
+            "is_error": event.get("is_error", False),
+            "subtype": event.get("subtype", ""),
+            "hidden_from_ui": True,
+        }
+        self._attach_raw_event(metadata, "original_event", event)
+        return self._make_message(
+            project_id=project_path,
+            role="system",
+            message_type="system",
+            content=(
+                f"Execution completed in {duration}ms. Final result: {result_text}"
+            ),
+            metadata=metadata,
+            session_id=session_id,
+            created_at=now,
+        )
 
-    async def _ensure_agent_md(self, project_path: str) -> None:
+    @staticmethod
+    def _attach_raw_event(
+        metadata: Dict[str, Any], key: str, event: Dict[str, Any]
+    ) -> None:
+        """Keep the full parsed event in metadata only when CURSOR_DEBUG_EVENTS is set.
+
+        Raw events (tool args and results in particular) can be large, and the
+        metadata is stored with every Message and sent to the frontend.
+        """
+        if env_flag("CURSOR_DEBUG_EVENTS"):
+            metadata[key] = event
+
+    # event type -> handler returning the Message for that event, if any
+    _EVENT_HANDLERS: Dict[str, Callable[..., Optional[Message]]] = {
+        "system": _handle_system,
+        "assistant": _handle_assistant,
+        "tool_call": _handle_tool_call,
+        "result": _handle_result,
+    }
+
+    # tool_call subtype -> handler building its Message, if any
+    _TOOL_CALL_HANDLERS: Dict[str, Callable[..., Optional[Message]]] = {
+        "started": _handle_tool_call_started,
+        "completed": _handle_tool_call_completed,
+    }
+
+    def _resolve_cli_model(self, model: Optional[str]) -> Optional[str]:
+        """_get_cli_model_name, mapped (and logged) once per distinct model"""
+        if not model:
+            return None
+        try:
+            return self._cli_model_cache[model]
+        except KeyError:
+            cli_model = self._cli_model_cache[model] = self._get_cli_model_name(model)
+            return cli_model
+
+    @staticmethod
+    def _resolve_repo_path(project_path: str) -> str:
+        """The project's repo/ subdirectory, or project_path when there is none"""
+        repo_path = os.path.join(project_path, "repo")
+        return repo_path if os.path.isdir(repo_path) else project_path
+
+    async def _ensure_agent_md(self, project_repo_path: str) -> None:
         """Ensure AGENTS.md exists in project repo with system prompt"""
-        # Determine the repo path
-        project_repo_path = os.path.join(project_path, "repo")
-        if not os.path.exists(project_repo_path):
-            project_repo_path = project_path
+        if project_repo_path in CursorAgentCLI._AGENTS_MD_READY:
+            return
 
         agent_md_path = os.path.join(project_repo_path, "AGENTS.md")
 
-        # Check if AGENTS.md already exists
-        if os.path.exists(agent_md_path):
-            print(f"📝 [Cursor] AGENTS.md already exists at: {agent_md_path}")
-            return
-
         try:
-            # Read system prompt from the source file using relative path
-            current_file_dir = os.path.dirname(os.path.abspath(__file__))
-            # this file is in: app/services/cli/adapters/
-            # go up to app/: adapters -> cli -> services -> app
-            app_dir = os.path.abspath(os.path.join(current_file_dir, "..", "..", ".."))
-            system_prompt_path = os.path.join(app_dir, "prompt", "system-prompt.md")
-
-            if os.path.exists(system_prompt_path):
-                with open(system_prompt_path, "r", encoding="utf-8") as f:
-                    system_prompt_content = f.read()
-
-                # Write to AGENTS.md in the project repo
-                with open(agent_md_path, "w", encoding="utf-8") as f:
-                    f.write(system_prompt_content)
-
-                print(f"📝 [Cursor] Created AGENTS.md at: {agent_md_path}")
-            else:
-                print(
-                    f"⚠️ [Cursor] System prompt file not found at: {system_prompt_path}"
-                )
+            system_prompt_content = load_system_prompt()
+            if system_prompt_content is None:
+                return
+
+            # Exists-check and write happen in a worker thread, off the event loop
+            created = await asyncio.to_thread(
+                self._create_agent_md, agent_md_path, system_prompt_content
+            )
+            CursorAgentCLI._AGENTS_MD_READY.add(project_repo_path)
+            if created:
+                ui.success(f"Created AGENTS.md at: {agent_md_path}", "Cursor")
+            elif ui.debug_enabled:
+                ui.debug(f"AGENTS.md already exists at: {agent_md_path}", "Cursor")
         except Exception as e:
-            print(f"❌ [Cursor] Failed to create AGENTS.md: {e}")
+            ui.error(f"Failed to create AGENTS.md: {e}", "Cursor")
+
+    @staticmethod
+    def _create_agent_md(agent_md_path: str, content: bytes) -> bool:
+        """Write AGENTS.md unless it exists; returns whether it was created"""
+        try:
+            fd = os.open(agent_md_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644)
+        except FileExistsError:
+            return False
+        with os.fdopen(fd, "wb") as f:
+            f.write(content)
+        return True
 
     async def execute_with_streaming(
         self,
@@ -268,21 +451,16 @@ class CursorAgentCLI(BaseCLI):
         api_key: Optional[str] = None,
     ) -> AsyncGenerator[Message, None]:
         """Execute Cursor Agent CLI with stream-json format and session continuity"""
+        # Resolve the working directory once; falls back to project_path if
+        # the repo subdir doesn't exist
+        project_repo_path = self._resolve_repo_path(project_path)
+
         # Ensure AGENTS.md exists for system prompt
-        await self._ensure_agent_md(project_path)
+        await self._ensure_agent_md(project_repo_path)
 
         # Extract project ID from path (format: .../projects/{project_id}/repo)
         # We need the project_id, not "repo"
-        path_parts = project_path.split("/")
-        if "repo" in path_parts and len(path_parts) >= 2:
-            # Get the folder before "repo"
-            repo_index = path_parts.index("repo")
-            if repo_index > 0:
-                project_id = path_parts[repo_index - 1]
-            else:
-                project_id = path_parts[-1] if path_parts else project_path
-        else:
-            project_id = path_parts[-1] if path_parts else project_path
+        project_id = get_project_id_from_path(project_path)
 
         stored_session_id = await self.get_session_id(project_id)
 
@@ -299,56 +477,97 @@ class CursorAgentCLI(BaseCLI):
         active_session_id = stored_session_id or session_id
         if active_session_id:
             cmd.extend(["--resume", active_session_id])
-            print(f"🔗 [Cursor] Resuming session: {active_session_id}")
+            ui.info(f"Resuming session: {active_session_id}", "Cursor")
 
         # Add API key if available (prioritize provided key over environment)
-        cursor_api_key = api_key or os.getenv("CURSOR_API_KEY")
+        cursor_api_key = api_key or self._env_api_key
         if cursor_api_key:
             cmd.extend(["--api-key", cursor_api_key])
 
         # Add model - prioritize parameter over environment variable
-        cli_model = self._get_cli_model_name(model) or os.getenv("CURSOR_MODEL")
+        cli_model = self._resolve_cli_model(model) or self._env_cursor_model
         if cli_model:
             cmd.extend(["-m", cli_model])
-            print(f"🔧 [Cursor] Using model: {cli_model}")
-
-        project_repo_path = os.path.join(project_path, "repo")
-        if not os.path.exists(project_repo_path):
-            project_repo_path = project_path  # Fallback to project_path if repo subdir doesn't exist
+            ui.info(f"Using model: {cli_model}", "Cursor")
 
+        process: Optional[asyncio.subprocess.Process] = None
+        stdout_closed = False  # cursor-agent closed stdout on its own
+        cursor_session_id: Optional[str] = None
         try:
             process = await asyncio.create_subprocess_exec(
                 *cmd,
                 stdout=asyncio.subprocess.PIPE,
                 stderr=asyncio.subprocess.PIPE,
                 cwd=project_repo_path,
+                limit=STREAM_LINE_LIMIT,
             )
 
-            cursor_session_id = None
-            assistant_message_buffer = ""
+            assistant_chunks: List[str] = []
             result_received = False  # Track if we received result event
 
-            async for line in process.stdout:
-                line_str = line.decode().strip()
-                if not line_str:
-                    continue
-
-                try:
-                    # Parse NDJSON event
-                    event = json.loads(line_str)
+            # A reader task keeps draining stdout into a bounded queue while this
+            # generator is suspended at a yield, so cursor-agent never blocks on
+            # a full pipe just because the consumer is slow
+            lines: asyncio.Queue = asyncio.Queue(maxsize=STREAM_QUEUE_SIZE)
+            reader_task = asyncio.create_task(self._pump_lines(process.stdout, lines))
+            # stderr is never parsed, but an unread pipe would stall cursor-agent
+            # once it fills, so it is drained alongside stdout
+            stderr_task = asyncio.create_task(self._drain_stderr(process.stderr))
+            try:
+                while True:
+                    line = await lines.get()
+                    if line is _STREAM_DONE:
+                        stdout_closed = True
+                        break
+                    if isinstance(line, Exception):
+                        raise line
+
+                    line = line.strip()
+                    if not line:
+                        continue
+
+                    try:
+                        # Parse NDJSON event straight from bytes, no decode() first
+                        event = json_loads(line)
+                    except ValueError as e:
+                        # Handle malformed JSON (orjson and json errors are both ValueError)
+                        line_str = line.decode(errors="replace")
+                        ui.warning(f"JSON decode error: {e}", "Cursor")
+                        if ui.debug_enabled:
+                            ui.debug(f"Raw line: {line_str}", "Cursor")
+
+                        # Still yield as raw output
+                        message = self._make_message(
+                            project_id=project_path,
+                            role="assistant",
+                            message_type="chat",
+                            content=line_str,
+                            metadata={
+                                "cli_type": self._cli_type_value,
+                                "raw_output": line_str,
+                                "parse_error": str(e),
+                            },
+                            session_id=session_id,
+                        )
+                        yield message
+                        continue
 
+                    # One timestamp for every message produced from this line
+                    now = utcnow()
                     event_type = event.get("type")
 
                     # Priority: Extract session ID from type: "result" event (most reliable)
                     if event_type == "result" and not cursor_session_id:
-                        print(f"🔍 [Cursor] Result event received: {event}")
+                        if ui.debug_enabled:
+                            ui.debug(f"Result event received: {event}", "Cursor")
                         session_id_from_result = event.get("session_id")
                         if session_id_from_result:
                             cursor_session_id = session_id_from_result
-                            await self.set_session_id(project_id, cursor_session_id)
-                            print(
-                                f"💾 [Cursor] Session ID extracted from result event: {cursor_session_id}"
-                            )
+                            if ui.debug_enabled:
+                                ui.debug(
+                                    f"Session ID extracted from result event: {cursor_session_id}",
+                                    "Cursor",
+                                )
 
                         # Mark that we received result event
                         result_received = True
@@ -356,60 +575,49 @@ class CursorAgentCLI(BaseCLI):
                     # Extract session ID from various event types
                     if not cursor_session_id:
                         # Try to extract session ID from any event that contains it
-                        potential_session_id = (
-                            event.get("sessionId")
-                            or event.get("chatId")
-                            or event.get("session_id")
-                            or event.get("chat_id")
-                            or event.get("threadId")
-                            or event.get("thread_id")
-                        )
+                        potential_session_id = _first_present(event, _SESSION_ID_KEYS)
 
                         # Also check in nested structures
-                        if not potential_session_id and isinstance(
-                            event.get("message"), dict
-                        ):
-                            potential_session_id = (
-                                event["message"].get("sessionId")
-                                or event["message"].get("chatId")
-                                or event["message"].get("session_id")
-                                or event["message"].get("chat_id")
-                            )
+                        if not potential_session_id:
+                            nested = event.get("message")
+                            if isinstance(nested, dict):
+                                potential_session_id = _first_present(
+                                    nested, _MESSAGE_SESSION_ID_KEYS
+                                )
 
                         if potential_session_id and potential_session_id != active_session_id:
                             cursor_session_id = potential_session_id
-                            await self.set_session_id(project_id, cursor_session_id)
-                            print(
-                                f"💾 [Cursor] Updated session ID for project {project_id}: {cursor_session_id}"
-                            )
-                            print(f"   Previous: {active_session_id}")
-                            print(f"   New: {cursor_session_id}")
+                            if ui.debug_enabled:
+                                ui.debug(
+                                    f"Updated session ID for project {project_id}: "
+                                    f"{active_session_id} -> {cursor_session_id}",
+                                    "Cursor",
+                                )
 
                     # If we receive a non-assistant message, flush the buffer first
-                    if event.get("type") != "assistant" and assistant_message_buffer:
-                        yield Message(
-                            id=str(uuid.uuid4()),
+                    if event_type != "assistant" and assistant_chunks:
+                        yield self._make_message(
                             project_id=project_path,
                             role="assistant",
                             message_type="chat",
-                            content=assistant_message_buffer,
-                            metadata_json={
-                                "cli_type": "cursor",
+                            content="".join(assistant_chunks),
+                            metadata={
+                                "cli_type": self._cli_type_value,
                                 "event_type": "assistant_aggregated",
                             },
                             session_id=session_id,
-                            created_at=datetime.utcnow(),
+                            created_at=now,
                         )
-                        assistant_message_buffer = ""
+                        assistant_chunks.clear()
 
                     # Process the event
                     message = self._handle_cursor_stream_json(
-                        event, project_path, session_id
+                        event, project_path, session_id, now
                     )
 
                     if message:
                         if message.role == "assistant" and message.message_type == "chat":
-                            assistant_message_buffer += message.content
+                            assistant_chunks.append(message.content)
                         else:
                             if log_callback:
                                 await log_callback(f"📝 [Cursor] {message.content}")
@@ -417,109 +625,144 @@ class CursorAgentCLI(BaseCLI):
 
                     # ★ CRITICAL: Break after result event to end streaming
                     if result_received:
-                        print(
-                            f"🏁 [Cursor] Result event received, terminating stream early"
+                        ui.debug(
+                            "Result event received, terminating stream early", "Cursor"
                         )
                         try:
                             process.terminate()
-                            print(f"🔪 [Cursor] Process terminated")
+                            ui.debug("Process terminated", "Cursor")
                         except Exception as e:
-                            print(f"⚠️ [Cursor] Failed to terminate process: {e}")
+                            ui.warning(f"Failed to terminate process: {e}", "Cursor")
                         break
-
-                except json.JSONDecodeError as e:
-                    # Handle malformed JSON
-                    print(f"⚠️ [Cursor] JSON decode error: {e}")
-                    print(f"⚠️ [Cursor] Raw line: {line_str}")
-
-                    # Still yield as raw output
-                    message = Message(
-                        id=str(uuid.uuid4()),
-                        project_id=project_path,
-                        role="assistant",
-                        message_type="chat",
-                        content=line_str,
-                        metadata_json={
-                            "cli_type": "cursor",
-                            "raw_output": line_str,
-                            "parse_error": str(e),
-                        },
-                        session_id=session_id,
-                        created_at=datetime.utcnow(),
-                    )
-                    yield message
+            finally:
+                reader_task.cancel()
+                stderr_task.cancel()
 
             # Flush any remaining content in the buffer
-            if assistant_message_buffer:
-                yield Message(
-                    id=str(uuid.uuid4()),
+            if assistant_chunks:
+                yield self._make_message(
                     project_id=project_path,
                     role="assistant",
                     message_type="chat",
-                    content=assistant_message_buffer,
-                    metadata_json={
-                        "cli_type": "cursor",
+                    content="".join(assistant_chunks),
+                    metadata={
+                        "cli_type": self._cli_type_value,
                         "event_type": "assistant_aggregated",
                     },
                     session_id=session_id,
-                    created_at=datetime.utcnow(),
                 )
 
-            await process.wait()
-
             # Log completion
             if cursor_session_id:
-                print(f"✅ [Cursor] Session completed: {cursor_session_id}")
+                ui.info(f"Session completed: {cursor_session_id}", "Cursor")
 
         except FileNotFoundError:
             error_msg = (
                 "❌ Cursor Agent CLI not found. Please install with: curl https://cursor.com/install -fsS | bash"
             )
-            yield Message(
-                id=str(uuid.uuid4()),
+            yield self._make_message(
                 project_id=project_path,
                 role="assistant",
                 message_type="error",
                 content=error_msg,
-                metadata_json={"error": "cli_not_found", "cli_type": "cursor"},
+                metadata={"error": "cli_not_found", "cli_type": self._cli_type_value},
                 session_id=session_id,
-                created_at=datetime.utcnow(),
             )
         except Exception as e:
             error_msg = f"❌ Cursor Agent execution failed: {str(e)}"
-            yield Message(
-                id=str(uuid.uuid4()),
+            yield self._make_message(
                 project_id=project_path,
                 role="assistant",
                 message_type="error",
                 content=error_msg,
-                metadata_json={
+                metadata={
                     "error": "execution_failed",
-                    "cli_type": "cursor",
+                    "cli_type": self._cli_type_value,
                     "exception": str(e),
                 },
                 session_id=session_id,
-                created_at=datetime.utcnow(),
             )
+        finally:
+            # Persist the session ID once per run, and only if it changed. This
+            # runs on every exit path so a failed or abandoned run can still be
+            # resumed; the stored value is only read back at the next run
+            if cursor_session_id and cursor_session_id != stored_session_id:
+                try:
+                    await self.set_session_id(project_id, cursor_session_id)
+                except Exception as e:
+                    ui.warning(f"Failed to persist session ID: {e}", "Cursor")
+            # Reap on every exit path, including the early break after the
+            # result event and a consumer that stops iterating
+            if process is not None:
+                await self._reap_process(process, stdout_closed)
+
+    async def _reap_process(
+        self, process: asyncio.subprocess.Process, stdout_closed: bool
+    ) -> None:
+        """Wait for cursor-agent to exit, escalating to SIGTERM and then SIGKILL.
+
+        A process that already closed stdout gets PROCESS_EXIT_TIMEOUT to exit
+        on its own; otherwise it is sent SIGTERM straight away.
+        """
+        if process.returncode is not None:
+            return
+        if stdout_closed:
+            try:
+                await asyncio.wait_for(process.wait(), timeout=PROCESS_EXIT_TIMEOUT)
+                return
+            except asyncio.TimeoutError:
+                ui.warning(
+                    "cursor-agent did not exit after its stream ended, terminating",
+                    "Cursor",
+                )
+        try:
+            process.terminate()
+            await asyncio.wait_for(process.wait(), timeout=PROCESS_TERMINATE_TIMEOUT)
+            return
+        except ProcessLookupError:
+            return
+        except asyncio.TimeoutError:
+            ui.warning("cursor-agent ignored SIGTERM, killing", "Cursor")
+        try:
+            process.kill()
+        except ProcessLookupError:
+            return
+        await process.wait()
+
+    @staticmethod
+    async def _pump_lines(stream: asyncio.StreamReader, queue: asyncio.Queue) -> None:
+        """Copy stdout lines into queue, ending with _STREAM_DONE or the read error"""
+        try:
+            async for line in stream:
+                await queue.put(line)
+            await queue.put(_STREAM_DONE)
+        except Exception as e:
+            await queue.put(e)
+
+    @staticmethod
+    async def _drain_stderr(stream: asyncio.StreamReader) -> None:
+        """Read stderr to EOF in chunks, surfacing it only as debug output"""
+        while True:
+            chunk = await stream.read(STDERR_CHUNK_SIZE)
+            if not chunk:
+                return
+            if ui.debug_enabled:
+                ui.debug(f"stderr: {chunk.decode(errors='replace').rstrip()}", "Cursor")
 
     async def get_session_id(self, project_id: str) -> Optional[str]:
         """Get stored session ID for project to enable session continuity"""
         if self.db_session:
             try:
-                from app.models.projects import Project
-
-                project = (
-                    self.db_session.query(Project)
-                    .filter(Project.id == project_id)
-                    .first()
+                # Blocking ORM query runs in a worker thread, off the event loop
+                session_id = await asyncio.to_thread(
+                    self._get_session_id_sync, project_id
                 )
-                if project and project.active_cursor_session_id:
-                    print(
-                        f"💾 [Cursor] Retrieved session ID from DB: {project.active_cursor_session_id}"
-                    )
-                    return project.active_cursor_session_id
+                if session_id:
+                    if ui.debug_enabled:
+                        ui.debug(f"Retrieved session ID from DB: {session_id}", "Cursor")
+                    return session_id
             except Exception as e:
-                print(f"⚠️ [Cursor] Failed to get session ID from DB: {e}")
+                ui.warning(f"Failed to get session ID from DB: {e}", "Cursor")
 
         # Fallback to in-memory storage
         return self._session_store.get(project_id)
@@ -529,35 +772,52 @@ class CursorAgentCLI(BaseCLI):
         # Store in database if available
         if self.db_session:
             try:
-                from app.models.projects import Project
-
-                project = (
-                    self.db_session.query(Project)
-                    .filter(Project.id == project_id)
-                    .first()
+                # Blocking ORM update and commit run in a worker thread
+                saved = await asyncio.to_thread(
+                    self._set_session_id_sync, project_id, session_id
                 )
-                if project:
-                    project.active_cursor_session_id = session_id
-                    self.db_session.commit()
-                    print(
-                        f"💾 [Cursor] Session ID saved to DB for project {project_id}: {session_id}"
-                    )
+                if saved:
+                    if ui.debug_enabled:
+                        ui.debug(
+                            f"Session ID saved to DB for project {project_id}: {session_id}",
+                            "Cursor",
+                        )
                     return
                 else:
-                    print(f"⚠️ [Cursor] Project {project_id} not found in DB")
+                    ui.warning(f"Project {project_id} not found in DB", "Cursor")
             except Exception as e:
-                print(f"⚠️ [Cursor] Failed to save session ID to DB: {e}")
+                ui.error(f"Failed to save session ID to DB: {e}", "Cursor")
                 import traceback
 
                 traceback.print_exc()
         else:
-            print(f"⚠️ [Cursor] No DB session available")
+            ui.warning("No DB session available", "Cursor")
 
         # Fallback to in-memory storage
         self._session_store[project_id] = session_id
-        print(
-            f"💾 [Cursor] Session ID stored in memory for project {project_id}: {session_id}"
-        )
+        if ui.debug_enabled:
+            ui.debug(
+                f"Session ID stored in memory for project {project_id}: {session_id}",
+                "Cursor",
+            )
+
+    def _get_session_id_sync(self, project_id: str) -> Optional[str]:
+        """Read the stored session ID; blocking, called via asyncio.to_thread"""
+        project = self.db_session.get(Project, project_id)
+        return project.active_cursor_session_id if project else None
+
+    def _set_session_id_sync(self, project_id: str, session_id: str) -> bool:
+        """Persist the session ID; blocking, returns False if the project is missing"""
+        project = self.db_session.get(Project, project_id)
+        if not project:
+            return False
+        project.active_cursor_session_id = session_id
+        self.db_session.commit()
+        # A plain Cursor id replaces any JSON blob holding Gemini's id
+        from .gemini_cli import GeminiCLI
+
+        GeminiCLI.forget_session(project_id)
+        return True
 
 
 __all__ = ["CursorAgentCLI"]
@@ -8,52 +8,203 @@ from __future__ import annotations
 
 import asyncio
 import base64
-import json
+import io
+import mmap
 import os
+import shutil
+import time
 import uuid
+from collections import OrderedDict, deque
 from datetime import datetime
-from typing import Any, AsyncGenerator, Awaitable, Callable, Dict, List, Optional
-
+from functools import lru_cache
+from typing import (
+    Any,
+    AsyncGenerator,
+    Awaitable,
+    Callable,
+    Deque,
+    Dict,
+    List,
+    Optional,
+    Set,
+    Tuple,
+)
+
+from app.core.json_codec import json_dumps, json_loads
 from app.core.terminal_ui import ui
 from app.models.messages import Message
+from app.models.projects import Project
 
-from ..base import BaseCLI, CLIType
+from ..base import BaseCLI, CLIType, get_project_id_from_path, load_system_prompt, utcnow
 from .qwen_cli import _ACPClient, _mime_for  # Reuse minimal ACP client
 
 
+# Seconds a successful check_availability result is reused
+AVAILABILITY_CACHE_TTL = 60.0
+
+
+@lru_cache(maxsize=1)
+def _load_provider_md() -> str:
+    """GEMINI.md content: a header plus the bundled system prompt, read once"""
+    content = "# GEMINI\n\n"
+    prompt = load_system_prompt()
+    if prompt is not None:
+        try:
+            content += prompt.decode("utf-8")
+        except UnicodeDecodeError:
+            pass
+    return content
+
+
+# Base64 of recently sent image files, keyed by (path, mtime_ns, size) so an
+# edited file is re-read; follow-up turns often re-send the same screenshot
+_IMAGE_B64_CACHE: "OrderedDict[Tuple[str, int, int], str]" = OrderedDict()
+_IMAGE_B64_CACHE_MAX_CHARS = 64 * 1024 * 1024
+_image_b64_cache_chars = 0
+
+
+def _image_file_b64(path: str) -> str:
+    """Base64 of an image file, served from a small LRU cache when unchanged"""
+    global _image_b64_cache_chars
+    st = os.stat(path)
+    key = (path, st.st_mtime_ns, st.st_size)
+    b64 = _IMAGE_B64_CACHE.get(key)
+    if b64 is not None:
+        _IMAGE_B64_CACHE.move_to_end(key)
+        return b64
+
+    with open(path, "rb") as f:
+        if st.st_size:
+            # Encode straight from a read-only mapping; no bytes copy of the file
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                # base64 output is pure ASCII, the cheapest codec to decode
+                b64 = base64.b64encode(mm).decode("ascii")
+        else:
+            b64 = ""  # mmap rejects empty files
+    if len(b64) <= _IMAGE_B64_CACHE_MAX_CHARS:
+        _IMAGE_B64_CACHE[key] = b64
+        _image_b64_cache_chars += len(b64)
+        while _image_b64_cache_chars > _IMAGE_B64_CACHE_MAX_CHARS:
+            _, evicted = _IMAGE_B64_CACHE.popitem(last=False)
+            _image_b64_cache_chars -= len(evicted)
+    return b64
+
+
+# session/update kinds that stream assistant text
+_CHUNK_KINDS = frozenset({"agent_message_chunk", "agent_thought_chunk"})
+
+# Keys a tool_call location may carry its file path under, in priority order
+_LOCATION_PATH_KEYS = ("path", "file", "file_path", "filePath", "uri")
+
+
+class _TextBuffer:
+    """Append-only text accumulator; falsy while empty, joined once on read"""
+
+    __slots__ = ("_io",)
+
+    def __init__(self) -> None:
+        self._io = io.StringIO()
+
+    def write(self, text: str) -> None:
+        self._io.write(text)
+
+    def __len__(self) -> int:
+        return self._io.tell()
+
+    def getvalue(self) -> str:
+        return self._io.getvalue()
+
+    def clear(self) -> None:
+        self._io.seek(0)
+        self._io.truncate()
+
+
 class GeminiCLI(BaseCLI):
     """Gemini CLI via ACP. Streams message and thought chunks to UI."""
 
     _SHARED_CLIENT: Optional[_ACPClient] = None
     _SHARED_INITIALIZED: bool = False
+    # Repo paths already known to contain GEMINI.md, shared across instances
+    _PROVISIONED_REPOS: Set[str] = set()
+    # (monotonic expiry, result) of the last successful availability check
+    _AVAILABILITY_CACHE: Optional[Tuple[float, Dict[str, Any]]] = None
+    # project_id -> Gemini session id, shared by every adapter instance
+    _SESSION_ID_CACHE: Dict[str, str] = {}
 
     def __init__(self, db_session=None):
         super().__init__(CLIType.GEMINI)
         self.db_session = db_session
-        self._session_store: Dict[str, str] = {}
         self._client: Optional[_ACPClient] = None
         self._initialized = False
+        # project_path -> (repo cwd, project id)
+        self._project_path_cache: Dict[str, Tuple[str, str]] = {}
+
+    def _resolve_project_paths(self, project_path: str) -> Tuple[str, str]:
+        """Repo working directory and project ID for a project path"""
+        cached = self._project_path_cache.get(project_path)
+        if cached is not None:
+            return cached
+
+        project_repo_path = os.path.join(project_path, "repo")
+        repo_exists = os.path.exists(project_repo_path)
+        if not repo_exists:
+            project_repo_path = project_path
+
+        project_id = get_project_id_from_path(project_path)
+
+        # The fallback to project_path is final only when it already is the
+        # repo dir; otherwise a repo/ created later must still be picked up
+        if repo_exists or os.path.basename(os.path.normpath(project_path)) == "repo":
+            self._project_path_cache[project_path] = (project_repo_path, project_id)
+        return project_repo_path, project_id
+
+    def _make_message(
+        self,
+        *,
+        project_id: str,
+        role: str,
+        message_type: str,
+        content: str,
+        metadata: Dict[str, Any],
+        session_id: Optional[str],
+        created_at: Optional[datetime] = None,
+    ) -> Message:
+        """Message for this adapter, stamped now unless created_at is given"""
+        return Message(
+            id=uuid.uuid4().hex,
+            project_id=project_id,
+            role=role,
+            message_type=message_type,
+            content=content,
+            metadata_json=metadata,
+            session_id=session_id,
+            created_at=created_at or utcnow(),
+        )
 
     async def check_availability(self) -> Dict[str, Any]:
+        cached = GeminiCLI._AVAILABILITY_CACHE
+        if cached is not None and time.monotonic() < cached[0]:
+            return dict(cached[1])
         try:
-            proc = await asyncio.create_subprocess_shell(
-                "gemini --help",
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE,
-            )
-            stdout, stderr = await proc.communicate()
-            if proc.returncode != 0:
+            # A PATH lookup instead of spawning `gemini --help` through a shell
+            if shutil.which("gemini") is None:
                 return {
                     "available": False,
                     "configured": False,
                     "error": "Gemini CLI not found. Install Gemini CLI and ensure it is in PATH.",
                 }
-            return {
+            result = {
                 "available": True,
                 "configured": True,
                 "models": self.get_supported_models(),
                 "default_models": [],
             }
+            # Only a positive result is reused, so a fresh install shows up at once
+            GeminiCLI._AVAILABILITY_CACHE = (
+                time.monotonic() + AVAILABILITY_CACHE_TTL,
+                result,
+            )
+            return dict(result)
         except Exception as e:
             return {"available": False, "configured": False, "error": str(e)}
 
@@ -61,31 +212,33 @@ class GeminiCLI(BaseCLI):
         """Ensure GEMINI.md exists at the project repo root.
 
         Mirrors CursorAgent behavior: copy app/prompt/system-prompt.md if present.
+        The filesystem work runs in a worker thread, off the event loop.
         """
         try:
-            project_repo_path = os.path.join(project_path, "repo")
-            if not os.path.exists(project_repo_path):
-                project_repo_path = project_path
+            project_repo_path, _ = self._resolve_project_paths(project_path)
+            if project_repo_path in GeminiCLI._PROVISIONED_REPOS:
+                return
             md_path = os.path.join(project_repo_path, "GEMINI.md")
-            if os.path.exists(md_path):
+            created = await asyncio.to_thread(self._create_provider_md, md_path)
+            GeminiCLI._PROVISIONED_REPOS.add(project_repo_path)
+            if created:
+                ui.success(f"Created GEMINI.md at: {md_path}", "Gemini")
+            else:
                 ui.debug(f"GEMINI.md already exists at: {md_path}", "Gemini")
-                return
-            current_file_dir = os.path.dirname(os.path.abspath(__file__))
-            app_dir = os.path.abspath(os.path.join(current_file_dir, "..", "..", ".."))
-            system_prompt_path = os.path.join(app_dir, "prompt", "system-prompt.md")
-            content = "# GEMINI\n\n"
-            if os.path.exists(system_prompt_path):
-                try:
-                    with open(system_prompt_path, "r", encoding="utf-8") as f:
-                        content += f.read()
-                except Exception:
-                    pass
-            with open(md_path, "w", encoding="utf-8") as f:
-                f.write(content)
-            ui.success(f"Created GEMINI.md at: {md_path}", "Gemini")
         except Exception as e:
             ui.warning(f"Failed to create GEMINI.md: {e}", "Gemini")
 
+    @staticmethod
+    def _create_provider_md(md_path: str) -> bool:
+        """Write GEMINI.md unless it exists; returns whether it was created"""
+        try:
+            f = open(md_path, "x", encoding="utf-8")
+        except FileExistsError:
+            return False
+        with f:
+            f.write(_load_provider_md())
+        return True
+
     async def _ensure_client(self) -> _ACPClient:
         if GeminiCLI._SHARED_CLIENT is None:
             cmd = ["gemini", "--experimental-acp"]
@@ -97,13 +250,15 @@ class GeminiCLI(BaseCLI):
             # Client-side request handlers: auto-approve permissions
             async def _handle_permission(params: Dict[str, Any]) -> Dict[str, Any]:
                 options = params.get("options") or []
-                chosen = None
-                for kind in ("allow_always", "allow_once"):
-                    chosen = next((o for o in options if o.get("kind") == kind), None)
-                    if chosen:
-                        break
-                if not chosen and options:
-                    chosen = options[0]
+                # Index options by kind in one pass; keep the first of each kind
+                by_kind: Dict[Any, Dict[str, Any]] = {}
+                for option in options:
+                    by_kind.setdefault(option.get("kind"), option)
+                chosen = (
+                    by_kind.get("allow_always")
+                    or by_kind.get("allow_once")
+                    or (options[0] if options else None)
+                )
                 if not chosen:
                     return {"outcome": {"outcome": "cancelled"}}
                 return {
@@ -151,7 +306,7 @@ class GeminiCLI(BaseCLI):
         client = await self._ensure_client()
         # Ensure provider markdown exists in project repo
         await self._ensure_provider_md(project_path)
-        turn_id = str(uuid.uuid4())[:8]
+        turn_id = uuid.uuid4().hex[:8]
         try:
             ui.debug(
                 f"[{turn_id}] execute_with_streaming start | model={model or '-'} | images={len(images or [])} | instruction_len={len(instruction or '')}",
@@ -160,18 +315,8 @@ class GeminiCLI(BaseCLI):
         except Exception:
             pass
 
-        # Resolve repo cwd
-        project_repo_path = os.path.join(project_path, "repo")
-        if not os.path.exists(project_repo_path):
-            project_repo_path = project_path
-
-        # Project ID
-        path_parts = project_path.split("/")
-        project_id = (
-            path_parts[path_parts.index("repo") - 1]
-            if "repo" in path_parts and path_parts.index("repo") > 0
-            else path_parts[-1]
-        )
+        # Resolve repo cwd and project ID
+        project_repo_path, project_id = self._resolve_project_paths(project_path)
 
         # Ensure session
         stored_session_id = await self.get_session_id(project_id)
@@ -204,50 +349,58 @@ class GeminiCLI(BaseCLI):
                         ui.info(f"[{turn_id}] session created after auth: {stored_session_id}", "Gemini")
                 except Exception as e2:
                     ui.error(f"[{turn_id}] authentication/session failed: {e2}", "Gemini")
-                    yield Message(
-                        id=str(uuid.uuid4()),
+                    yield self._make_message(
                         project_id=project_path,
                         role="assistant",
                         message_type="error",
                         content=f"Gemini authentication/session failed: {e2}",
-                        metadata_json={"cli_type": self.cli_type.value},
+                        metadata={"cli_type": self.cli_type.value},
                         session_id=session_id,
-                        created_at=datetime.utcnow(),
                     )
                     return
 
-        q: asyncio.Queue = asyncio.Queue()
-        thought_buffer: List[str] = []
-        text_buffer: List[str] = []
+        # Single producer (_on_update) and single consumer (the loop below):
+        # a deque plus a bare wakeup future, replaced after each wakeup, instead
+        # of asyncio.Queue's per-item waiters or an Event.wait() task per wakeup
+        loop = asyncio.get_running_loop()
+        pending_updates: Deque[Dict[str, Any]] = deque()
+        updates_ready: asyncio.Future = loop.create_future()
+        thought_buffer = _TextBuffer()
+        text_buffer = _TextBuffer()
 
         def _on_update(params: Dict[str, Any]) -> None:
             try:
                 if params.get("sessionId") != stored_session_id:
                     return
                 update = params.get("update") or {}
-                try:
-                    kind = update.get("sessionUpdate") or update.get("type")
-                    snippet = ""
-                    if isinstance(update.get("text"), str):
-                        snippet = update.get("text")[:80]
-                    elif isinstance((update.get("content") or {}).get("text"), str):
-                        snippet = (update.get("content") or {}).get("text")[:80]
-                    ui.debug(
-                        f"[{turn_id}] notif session/update kind={kind} snippet={snippet!r}",
-                        "Gemini",
-                    )
-                except Exception:
-                    pass
-                q.put_nowait(update)
+                if ui.debug_enabled:
+                    try:
+                        kind = update.get("sessionUpdate") or update.get("type")
+                        snippet = ""
+                        # Only message/thought chunks carry text worth previewing
+                        if kind in _CHUNK_KINDS:
+                            if isinstance(update.get("text"), str):
+                                snippet = update.get("text")[:80]
+                            elif isinstance((update.get("content") or {}).get("text"), str):
+                                snippet = (update.get("content") or {}).get("text")[:80]
+                        ui.debug(
+                            f"[{turn_id}] notif session/update kind={kind} snippet={snippet!r}",
+                            "Gemini",
+                        )
+                    except Exception:
+                        pass
+                pending_updates.append(update)
+                if not updates_ready.done():
+                    updates_ready.set_result(None)
             except Exception:
                 pass
 
         client.on_notification("session/update", _on_update)
 
         # Build prompt parts
-        parts: List[Dict[str, Any]] = []
-        if instruction:
-            parts.append({"type": "text", "text": instruction})
+        parts: List[Dict[str, Any]] = (
+            [{"type": "text", "text": instruction}] if instruction else []
+        )
         if images:
             def _iget(obj, key, default=None):
                 try:
@@ -265,13 +418,12 @@ class GeminiCLI(BaseCLI):
                         b64 = _iget(image, "url").split(",", 1)[1]
                     except Exception:
                         b64 = None
-                if local_path and os.path.exists(local_path):
+                if local_path:
                     try:
-                        with open(local_path, "rb") as f:
-                            data = f.read()
                         mime = _mime_for(local_path)
-                        b64 = base64.b64encode(data).decode("utf-8")
-                        parts.append({"type": "image", "mimeType": mime, "data": b64})
+                        parts.append(
+                            {"type": "image", "mimeType": mime, "data": _image_file_b64(local_path)}
+                        )
                         continue
                     except Exception:
                         pass
@@ -288,98 +440,100 @@ class GeminiCLI(BaseCLI):
             )
         prompt_task = _make_prompt_task()
 
-        while True:
-            done, _ = await asyncio.wait(
-                {prompt_task, asyncio.create_task(q.get())},
-                return_when=asyncio.FIRST_COMPLETED,
-            )
-            if prompt_task in done:
-                ui.debug(f"[{turn_id}] prompt_task completed; draining updates", "Gemini")
-                # Drain remaining
-                while not q.empty():
-                    update = q.get_nowait()
-                    async for m in self._update_to_messages(update, project_path, session_id, thought_buffer, text_buffer):
-                        if m:
-                            yield m
-                exc = prompt_task.exception()
-                if exc:
-                    msg = str(exc)
-                    if "Session not found" in msg or "session not found" in msg.lower():
-                        ui.warning(f"[{turn_id}] session expired; creating a new session and retrying", "Gemini")
-                        try:
-                            result = await client.request(
-                                "session/new", {"cwd": project_repo_path, "mcpServers": []}
-                            )
-                            stored_session_id = result.get("sessionId")
-                            if stored_session_id:
-                                await self.set_session_id(project_id, stored_session_id)
-                                ui.info(f"[{turn_id}] new session={stored_session_id}; retrying prompt", "Gemini")
-                                prompt_task = _make_prompt_task()
-                                continue
-                        except Exception as e2:
-                            ui.error(f"[{turn_id}] session recovery failed: {e2}", "Gemini")
-                            yield Message(
-                                id=str(uuid.uuid4()),
+        try:
+            while True:
+                done, _ = await asyncio.wait(
+                    {prompt_task, updates_ready},
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                if updates_ready in done:
+                    # Re-arm before draining so an append made while we yield
+                    # below resolves the new future rather than being missed
+                    updates_ready = loop.create_future()
+                    while pending_updates:
+                        update = pending_updates.popleft()
+                        if ui.debug_enabled:
+                            try:
+                                kind = update.get("sessionUpdate") or update.get("type")
+                                ui.debug(f"[{turn_id}] processing update kind={kind}", "Gemini")
+                            except Exception:
+                                pass
+                        async for m in self._update_to_messages(update, project_path, session_id, thought_buffer, text_buffer):
+                            if m:
+                                yield m
+                if prompt_task in done:
+                    ui.debug(f"[{turn_id}] prompt_task completed; draining updates", "Gemini")
+                    # Drain remaining
+                    while pending_updates:
+                        update = pending_updates.popleft()
+                        async for m in self._update_to_messages(update, project_path, session_id, thought_buffer, text_buffer):
+                            if m:
+                                yield m
+                    exc = prompt_task.exception()
+                    if exc:
+                        msg = str(exc)
+                        if "Session not found" in msg or "session not found" in msg.lower():
+                            ui.warning(f"[{turn_id}] session expired; creating a new session and retrying", "Gemini")
+                            try:
+                                result = await client.request(
+                                    "session/new", {"cwd": project_repo_path, "mcpServers": []}
+                                )
+                                stored_session_id = result.get("sessionId")
+                                if stored_session_id:
+                                    await self.set_session_id(project_id, stored_session_id)
+                                    ui.info(f"[{turn_id}] new session={stored_session_id}; retrying prompt", "Gemini")
+                                    prompt_task = _make_prompt_task()
+                                    continue
+                            except Exception as e2:
+                                ui.error(f"[{turn_id}] session recovery failed: {e2}", "Gemini")
+                                yield self._make_message(
+                                    project_id=project_path,
+                                    role="assistant",
+                                    message_type="error",
+                                    content=f"Gemini session recovery failed: {e2}",
+                                    metadata={"cli_type": self.cli_type.value},
+                                    session_id=session_id,
+                                )
+                        else:
+                            ui.error(f"[{turn_id}] prompt error: {msg}", "Gemini")
+                            yield self._make_message(
                                 project_id=project_path,
                                 role="assistant",
                                 message_type="error",
-                                content=f"Gemini session recovery failed: {e2}",
-                                metadata_json={"cli_type": self.cli_type.value},
+                                content=f"Gemini prompt error: {msg}",
+                                metadata={"cli_type": self.cli_type.value},
                                 session_id=session_id,
-                                created_at=datetime.utcnow(),
                             )
-                    else:
-                        ui.error(f"[{turn_id}] prompt error: {msg}", "Gemini")
-                        yield Message(
-                            id=str(uuid.uuid4()),
+                    # Final flush of buffered assistant content (with <thinking> block)
+                    if thought_buffer or text_buffer:
+                        if ui.debug_enabled:
+                            ui.debug(
+                                f"[{turn_id}] flushing buffered content thought_len={len(thought_buffer)} text_len={len(text_buffer)}",
+                                "Gemini",
+                            )
+                        yield self._make_message(
                             project_id=project_path,
                             role="assistant",
-                            message_type="error",
-                            content=f"Gemini prompt error: {msg}",
-                            metadata_json={"cli_type": self.cli_type.value},
+                            message_type="chat",
+                            content=self._compose_content(thought_buffer, text_buffer),
+                            metadata={"cli_type": self.cli_type.value},
                             session_id=session_id,
-                            created_at=datetime.utcnow(),
                         )
-                # Final flush of buffered assistant content (with <thinking> block)
-                if thought_buffer or text_buffer:
-                    ui.debug(
-                        f"[{turn_id}] flushing buffered content thought_len={sum(len(x) for x in thought_buffer)} text_len={sum(len(x) for x in text_buffer)}",
-                        "Gemini",
-                    )
-                    yield Message(
-                        id=str(uuid.uuid4()),
-                        project_id=project_path,
-                        role="assistant",
-                        message_type="chat",
-                        content=self._compose_content(thought_buffer, text_buffer),
-                        metadata_json={"cli_type": self.cli_type.value},
-                        session_id=session_id,
-                        created_at=datetime.utcnow(),
-                    )
-                    thought_buffer.clear()
-                    text_buffer.clear()
-                break
-            for task in done:
-                if task is not prompt_task:
-                    update = task.result()
-                    try:
-                        kind = update.get("sessionUpdate") or update.get("type")
-                        ui.debug(f"[{turn_id}] processing update kind={kind}", "Gemini")
-                    except Exception:
-                        pass
-                    async for m in self._update_to_messages(update, project_path, session_id, thought_buffer, text_buffer):
-                        if m:
-                            yield m
-
-        yield Message(
-            id=str(uuid.uuid4()),
+                        thought_buffer.clear()
+                        text_buffer.clear()
+                    break
+        finally:
+            updates_ready.cancel()
+            # The client is shared; drop this turn's handler so they don't pile up
+            client.off_notification("session/update", _on_update)
+
+        yield self._make_message(
             project_id=project_path,
             role="system",
             message_type="result",
             content="Gemini turn completed",
-            metadata_json={"cli_type": self.cli_type.value, "hidden_from_ui": True},
+            metadata={"cli_type": self.cli_type.value, "hidden_from_ui": True},
             session_id=session_id,
-            created_at=datetime.utcnow(),
         )
         ui.info(f"[{turn_id}] turn completed", "Gemini")
 
@@ -388,39 +542,39 @@ class GeminiCLI(BaseCLI):
         update: Dict[str, Any],
         project_path: str,
         session_id: Optional[str],
-        thought_buffer: List[str],
-        text_buffer: List[str],
+        thought_buffer: _TextBuffer,
+        text_buffer: _TextBuffer,
     ) -> AsyncGenerator[Optional[Message], None]:
         kind = update.get("sessionUpdate") or update.get("type")
-        now = datetime.utcnow()
-        if kind in ("agent_message_chunk", "agent_thought_chunk"):
+        now = utcnow()
+        if kind in _CHUNK_KINDS:
             text = ((update.get("content") or {}).get("text")) or update.get("text") or ""
-            try:
-                ui.debug(
-                    f"update chunk kind={kind} len={len(text or '')}",
-                    "Gemini",
-                )
-            except Exception:
-                pass
+            if ui.debug_enabled:
+                try:
+                    ui.debug(
+                        f"update chunk kind={kind} len={len(text or '')}",
+                        "Gemini",
+                    )
+                except Exception:
+                    pass
             if not isinstance(text, str):
                 text = str(text)
             if kind == "agent_thought_chunk":
-                thought_buffer.append(text)
+                thought_buffer.write(text)
             else:
                 # First assistant message chunk after thinking: render thinking immediately
                 if thought_buffer and not text_buffer:
-                    yield Message(
-                        id=str(uuid.uuid4()),
+                    yield self._make_message(
                         project_id=project_path,
                         role="assistant",
                         message_type="chat",
-                        content=self._compose_content(thought_buffer, []),
-                        metadata_json={"cli_type": self.cli_type.value, "event_type": "thinking"},
+                        content=self._compose_content(thought_buffer),
+                        metadata={"cli_type": self.cli_type.value, "event_type": "thinking"},
                         session_id=session_id,
                         created_at=now,
                     )
                     thought_buffer.clear()
-                text_buffer.append(text)
+                text_buffer.write(text)
             return
         elif kind in ("tool_call", "tool_call_update"):
             tool_name = self._parse_tool_name(update)
@@ -435,13 +589,14 @@ class GeminiCLI(BaseCLI):
             ):
                 should_render = True
             if not should_render:
-                try:
-                    ui.debug(
-                        f"skip tool event kind={kind} name={tool_name} normalized={normalized}",
-                        "Gemini",
-                    )
-                except Exception:
-                    pass
+                if ui.debug_enabled:
+                    try:
+                        ui.debug(
+                            f"skip tool event kind={kind} name={tool_name} normalized={normalized}",
+                            "Gemini",
+                        )
+                    except Exception:
+                        pass
                 return
             try:
                 ui.info(
@@ -453,25 +608,23 @@ class GeminiCLI(BaseCLI):
             summary = self._create_tool_summary(tool_name, tool_input)
             # Flush buffered chat before tool use
             if thought_buffer or text_buffer:
-                yield Message(
-                    id=str(uuid.uuid4()),
+                yield self._make_message(
                     project_id=project_path,
                     role="assistant",
                     message_type="chat",
                     content=self._compose_content(thought_buffer, text_buffer),
-                    metadata_json={"cli_type": self.cli_type.value},
+                    metadata={"cli_type": self.cli_type.value},
                     session_id=session_id,
                     created_at=now,
                 )
                 thought_buffer.clear()
                 text_buffer.clear()
-            yield Message(
-                id=str(uuid.uuid4()),
+            yield self._make_message(
                 project_id=project_path,
                 role="assistant",
                 message_type="tool_use",
                 content=summary,
-                metadata_json={
+                metadata={
                     "cli_type": self.cli_type.value,
                     "event_type": kind,
                     "tool_name": tool_name,
@@ -493,37 +646,37 @@ class GeminiCLI(BaseCLI):
                     lines.append(f"• {title}")
             content = "\n".join(lines) if lines else "Planning…"
             if thought_buffer or text_buffer:
-                yield Message(
-                    id=str(uuid.uuid4()),
+                yield self._make_message(
                     project_id=project_path,
                     role="assistant",
                     message_type="chat",
                     content=self._compose_content(thought_buffer, text_buffer),
-                    metadata_json={"cli_type": self.cli_type.value},
+                    metadata={"cli_type": self.cli_type.value},
                     session_id=session_id,
                     created_at=now,
                 )
             thought_buffer.clear()
             text_buffer.clear()
-            yield Message(
-                id=str(uuid.uuid4()),
+            yield self._make_message(
                 project_id=project_path,
                 role="assistant",
                 message_type="chat",
                 content=content,
-                metadata_json={"cli_type": self.cli_type.value, "event_type": "plan"},
+                metadata={"cli_type": self.cli_type.value, "event_type": "plan"},
                 session_id=session_id,
                 created_at=now,
             )
 
-    def _compose_content(self, thought_buffer: List[str], text_buffer: List[str]) -> str:
+    def _compose_content(
+        self, thought_buffer: _TextBuffer, text_buffer: Optional[_TextBuffer] = None
+    ) -> str:
         parts: List[str] = []
         if thought_buffer:
-            thinking = "".join(thought_buffer).strip()
+            thinking = thought_buffer.getvalue().strip()
             if thinking:
                 parts.append(f"<thinking>\n{thinking}\n</thinking>\n")
         if text_buffer:
-            parts.append("".join(text_buffer))
+            parts.append(text_buffer.getvalue())
         return "".join(parts)
 
     def _parse_tool_name(self, update: Dict[str, Any]) -> str:
@@ -540,15 +693,12 @@ class GeminiCLI(BaseCLI):
         if isinstance(locs, list) and locs:
             first = locs[0]
             if isinstance(first, dict):
-                path = (
-                    first.get("path")
-                    or first.get("file")
-                    or first.get("file_path")
-                    or first.get("filePath")
-                    or first.get("uri")
-                )
-                if isinstance(path, str) and path.startswith("file://"):
-                    path = path[len("file://"):]
+                for key in _LOCATION_PATH_KEYS:
+                    path = first.get(key)
+                    if path:
+                        break
+                if isinstance(path, str):
+                    path = path.removeprefix("file://")
         if not path:
             content = update.get("content")
             if isinstance(content, list):
@@ -567,54 +717,72 @@ class GeminiCLI(BaseCLI):
             tool_input["path"] = str(path)
         return tool_input
 
+    @classmethod
+    def forget_session(cls, project_id: str) -> None:
+        """Drop the cached session id after the project's session blob changed"""
+        cls._SESSION_ID_CACHE.pop(project_id, None)
+
     async def get_session_id(self, project_id: str) -> Optional[str]:
+        # The cache answers follow-up turns without a DB read; writers of the
+        # session blob call forget_session, and an id that went stale in
+        # another process is caught by the "Session not found" retry
+        cached = GeminiCLI._SESSION_ID_CACHE.get(project_id)
+        if cached:
+            return cached
         if self.db_session:
             try:
-                from app.models.projects import Project
-
-                project = (
-                    self.db_session.query(Project)
-                    .filter(Project.id == project_id)
-                    .first()
+                session_id = await asyncio.to_thread(
+                    self._get_session_id_sync, project_id
                 )
-                if project and project.active_cursor_session_id:
-                    try:
-                        data = json.loads(project.active_cursor_session_id)
-                        if isinstance(data, dict) and "gemini" in data:
-                            return data["gemini"]
-                    except Exception:
-                        pass
+                if session_id:
+                    GeminiCLI._SESSION_ID_CACHE[project_id] = session_id
+                    return session_id
             except Exception as e:
                 ui.warning(f"Gemini get_session_id DB error: {e}", "Gemini")
-        return self._session_store.get(project_id)
+        return None
 
     async def set_session_id(self, project_id: str, session_id: str) -> None:
+        # Cache first so follow-up turns skip the DB even if the write fails
+        if session_id:
+            GeminiCLI._SESSION_ID_CACHE[project_id] = session_id
+        else:
+            GeminiCLI.forget_session(project_id)
         if self.db_session:
             try:
-                from app.models.projects import Project
-
-                project = (
-                    self.db_session.query(Project)
-                    .filter(Project.id == project_id)
-                    .first()
+                await asyncio.to_thread(
+                    self._set_session_id_sync, project_id, session_id
                 )
-                if project:
-                    data: Dict[str, Any] = {}
-                    if project.active_cursor_session_id:
-                        try:
-                            val = json.loads(project.active_cursor_session_id)
-                            if isinstance(val, dict):
-                                data = val
-                            else:
-                                data = {"cursor": val}
-                        except Exception:
-                            data = {"cursor": project.active_cursor_session_id}
-                    data["gemini"] = session_id
-                    project.active_cursor_session_id = json.dumps(data)
-                    self.db_session.commit()
             except Exception as e:
                 ui.warning(f"Gemini set_session_id DB error: {e}", "Gemini")
-        self._session_store[project_id] = session_id
 
+    def _get_session_id_sync(self, project_id: str) -> Optional[str]:
+        """Gemini entry of the project's session blob; blocking"""
+        project = self.db_session.get(Project, project_id)
+        if project and project.active_cursor_session_id:
+            try:
+                data = json_loads(project.active_cursor_session_id)
+                if isinstance(data, dict) and "gemini" in data:
+                    return data["gemini"]
+            except Exception:
+                pass
+        return None
+
+    def _set_session_id_sync(self, project_id: str, session_id: str) -> None:
+        """Merge the Gemini session id into the project's session blob; blocking"""
+        project = self.db_session.get(Project, project_id)
+        if project:
+            data: Dict[str, Any] = {}
+            if project.active_cursor_session_id:
+                try:
+                    val = json_loads(project.active_cursor_session_id)
+                    if isinstance(val, dict):
+                        data = val
+                    else:
+                        data = {"cursor": val}
+                except Exception:
+                    data = {"cursor": project.active_cursor_session_id}
+            data["gemini"] = session_id
+            project.active_cursor_session_id = json_dumps(data)
+            self.db_session.commit()
 
 __all__ = ["GeminiCLI"]
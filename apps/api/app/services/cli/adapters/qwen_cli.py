@@ -10,21 +10,121 @@ import asyncio
 import base64
 import json
 import os
+import re
+import time
 import uuid
-from dataclasses import dataclass
 import shutil
-from datetime import datetime
-from typing import Any, AsyncGenerator, Awaitable, Callable, Dict, List, Optional
+from collections import deque
+from functools import lru_cache
+from typing import Any, AsyncGenerator, Awaitable, Callable, Deque, Dict, Iterator, List, Optional, Set, Tuple
 
+from app.core.json_codec import json_dumps_line, json_loads
 from app.core.terminal_ui import ui
 from app.models.messages import Message
 
-from ..base import BaseCLI, CLIType
+from ..base import BaseCLI, CLIType, utcnow
 
+# Buffered bytes on the agent's stdin above which writers wait for it to drain
+WRITE_HIGH_WATER = 64 * 1024
 
-@dataclass
-class _Pending:
-    fut: asyncio.Future
+# Bytes requested per read of the agent's stderr
+STDERR_CHUNK_SIZE = 8 * 1024
+
+# ENOENT noise about these paths comes from npm package resolution
+_ENOENT_NOISE_MARKERS = (b"node_modules", b"tailwind", b"supabase")
+_POLLING_FOR_TOKEN_SEARCH = re.compile(rb"polling for token", re.IGNORECASE).search
+
+
+# Qwen internal call-ID lines and runs of blank lines, stripped from chat text
+_CALL_ID_LINE_RE = re.compile(r"(?m)^call[_-][A-Za-z0-9]+.*$\n?")
+_EXCESS_BLANK_LINES_RE = re.compile(r"\n{3,}")
+
+
+# Tool names that are really Qwen call IDs; such tool calls are not shown
+_OPAQUE_TOOL_NAMES = frozenset({"call", "tool", "toolcall"})
+_OPAQUE_TOOL_PREFIXES = ("call_", "call-")
+
+
+@lru_cache(maxsize=None)
+def _resolve_qwen_cmd(env_cmd: Optional[str]) -> str:
+    """Resolve command: env(QWEN_CMD) -> qwen -> qwen-code.
+
+    Keyed on QWEN_CMD. A miss raises, and lru_cache does not cache
+    exceptions, so a CLI installed later is still found on the next call.
+    """
+    candidates = [env_cmd] if env_cmd else []
+    candidates.extend(["qwen", "qwen-code"])
+    for c in candidates:
+        if shutil.which(c):
+            return c
+    raise RuntimeError(
+        "Qwen CLI not found. Set QWEN_CMD or install 'qwen' CLI in PATH."
+    )
+
+
+def _chat_flush_interval() -> float:
+    """Seconds from QWEN_CHAT_FLUSH_INTERVAL; 0 (the default) disables mid-turn flushes"""
+    try:
+        return max(0.0, float(os.getenv("QWEN_CHAT_FLUSH_INTERVAL") or 0))
+    except ValueError:
+        return 0.0
+
+
+def _is_stderr_noise(line: bytes) -> bool:
+    """Whether a raw stderr line is known Qwen chatter not worth logging"""
+    # Skip ImportProcessor errors (these are just warnings about npm packages)
+    if b"[ERROR] [ImportProcessor]" in line:
+        return True
+    # Skip ENOENT errors for node_modules paths
+    if b"ENOENT" in line and any(m in line for m in _ENOENT_NOISE_MARKERS):
+        return True
+    # Skip polling for token messages; matched case-insensitively without
+    # building a lower-cased copy of every line
+    return _POLLING_FOR_TOKEN_SEARCH(line) is not None
+
+
+class _FrameProtocol(asyncio.Protocol):
+    """Splits the agent's stdout into newline-delimited frames as bytes arrive.
+
+    Complete frames are handed to on_frame straight from the transport's
+    read callback, with no StreamReader or reader task in between. Unix pipe
+    transports only support plain Protocols, not BufferedProtocol.
+    """
+
+    def __init__(self, on_frame: Callable[[bytes], None]):
+        self._on_frame = on_frame
+        self._tail = bytearray()  # bytes of a frame whose newline has not arrived
+
+    def data_received(self, data: bytes) -> None:
+        tail = self._tail
+        tail.extend(data)
+        start = 0
+        while True:
+            nl = tail.find(b"\n", start)
+            if nl < 0:
+                break
+            frame = bytes(tail[start:nl])
+            start = nl + 1
+            self._deliver(frame)
+        # Drop consumed frames once per read, keeping any partial tail
+        del tail[:start]
+
+    def eof_received(self) -> None:
+        if self._tail:
+            frame = bytes(self._tail)
+            self._tail.clear()
+            self._deliver(frame)
+
+    def _deliver(self, frame: bytes) -> None:
+        # An error escaping here would reach the transport and close the pipe,
+        # and the frame would still be sitting in the tail for the next read
+        try:
+            self._on_frame(frame)
+        except Exception:
+            pass
+
+    def connection_lost(self, exc: Optional[Exception]) -> None:
+        self.eof_received()
 
 
 class _ACPClient:
@@ -36,25 +136,39 @@ class _ACPClient:
         self._cwd = cwd or os.getcwd()
         self._proc: Optional[asyncio.subprocess.Process] = None
         self._next_id = 1
-        self._pending: Dict[int, _Pending] = {}
-        self._notif_handlers: Dict[str, List[Callable[[Dict[str, Any]], None]]] = {}
+        self._pending: Dict[int, asyncio.Future] = {}
+        # Tuples, rebuilt on (un)registration, which is rare next to dispatch
+        self._notif_handlers: Dict[str, Tuple[Callable[[Dict[str, Any]], None], ...]] = {}
         self._request_handlers: Dict[str, Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]]] = {}
-        self._reader_task: Optional[asyncio.Task] = None
+        self._stdout_transport: Optional[asyncio.ReadTransport] = None
+        # Agent requests being answered; referenced so they are not collected
+        self._request_tasks: Set[asyncio.Task] = set()
 
     async def start(self) -> None:
         if self._proc is not None:
             return
-        self._proc = await asyncio.create_subprocess_exec(
-            *self._cmd,
-            stdin=asyncio.subprocess.PIPE,
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE,
-            env=self._env,
-            cwd=self._cwd,
-        )
+        # stdout goes to a pipe we own, read by _FrameProtocol rather than
+        # through the subprocess StreamReader
+        read_fd, write_fd = os.pipe()
+        try:
+            self._proc = await asyncio.create_subprocess_exec(
+                *self._cmd,
+                stdin=asyncio.subprocess.PIPE,
+                stdout=write_fd,
+                stderr=asyncio.subprocess.PIPE,
+                env=self._env,
+                cwd=self._cwd,
+            )
+        except BaseException:
+            os.close(read_fd)
+            raise
+        finally:
+            os.close(write_fd)
 
-        # Start reader
-        self._reader_task = asyncio.create_task(self._reader_loop())
+        self._stdout_transport, _ = await asyncio.get_running_loop().connect_read_pipe(
+            lambda: _FrameProtocol(self._dispatch_frame),
+            os.fdopen(read_fd, "rb", buffering=0),
+        )
 
     async def stop(self) -> None:
         try:
@@ -66,12 +180,19 @@ class _ACPClient:
                     self._proc.kill()
         finally:
             self._proc = None
-            if self._reader_task:
-                self._reader_task.cancel()
-                self._reader_task = None
+            if self._stdout_transport:
+                self._stdout_transport.close()
+                self._stdout_transport = None
 
     def on_notification(self, method: str, handler: Callable[[Dict[str, Any]], None]) -> None:
-        self._notif_handlers.setdefault(method, []).append(handler)
+        self._notif_handlers[method] = self._notif_handlers.get(method, ()) + (handler,)
+
+    def off_notification(self, method: str, handler: Callable[[Dict[str, Any]], None]) -> None:
+        handlers = tuple(h for h in self._notif_handlers.get(method, ()) if h is not handler)
+        if handlers:
+            self._notif_handlers[method] = handlers
+        else:
+            self._notif_handlers.pop(method, None)
 
     def on_request(self, method: str, handler: Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]]) -> None:
         self._request_handlers[method] = handler
@@ -82,80 +203,92 @@ class _ACPClient:
         msg_id = self._next_id
         self._next_id += 1
         fut: asyncio.Future = asyncio.get_running_loop().create_future()
-        self._pending[msg_id] = _Pending(fut=fut)
+        self._pending[msg_id] = fut
         obj = {"jsonrpc": "2.0", "id": msg_id, "method": method, "params": params or {}}
-        data = (json.dumps(obj) + "\n").encode("utf-8")
-        self._proc.stdin.write(data)
-        await self._proc.stdin.drain()
+        await self._write_frame(json_dumps_line(obj))
         return await fut
 
-    async def _reader_loop(self) -> None:
-        assert self._proc and self._proc.stdout
-        stdout = self._proc.stdout
-        buffer = b""
-        while True:
-            line = await stdout.readline()
-            if not line:
-                break
-            line = line.strip()
-            if not line:
-                continue
+    def _dispatch_frame(self, line: bytes) -> None:
+        try:
+            # Both codecs take UTF-8 bytes and ignore surrounding whitespace,
+            # including a trailing \r, so frames are not stripped first
+            msg = json_loads(line)
+        except Exception:
+            # best-effort: ignore malformed (and blank) lines
+            return
+        if not isinstance(msg, dict):
+            return
+        has_id = "id" in msg
+
+        # Response
+        if "method" not in msg:
+            if not has_id:
+                return
             try:
-                msg = json.loads(line.decode("utf-8"))
-            except Exception:
-                # best-effort: ignore malformed
-                continue
-
-            # Response
-            if isinstance(msg, dict) and "id" in msg and "method" not in msg:
-                slot = self._pending.pop(int(msg["id"])) if int(msg["id"]) in self._pending else None
-                if not slot:
-                    continue
-                if "error" in msg:
-                    slot.fut.set_exception(RuntimeError(str(msg["error"])))
-                else:
-                    slot.fut.set_result(msg.get("result"))
-                continue
-
-            # Request from agent (client-side)
-            if isinstance(msg, dict) and "method" in msg and "id" in msg:
-                req_id = msg["id"]
-                method = msg["method"]
-                params = msg.get("params") or {}
-                handler = self._request_handlers.get(method)
-                if handler:
-                    try:
-                        result = await handler(params)
-                        await self._send({"jsonrpc": "2.0", "id": req_id, "result": result})
-                    except Exception as e:
-                        await self._send({
-                            "jsonrpc": "2.0",
-                            "id": req_id,
-                            "error": {"code": -32000, "message": str(e)},
-                        })
-                else:
-                    await self._send({
-                        "jsonrpc": "2.0",
-                        "id": req_id,
-                        "error": {"code": -32601, "message": "Method not found"},
-                    })
-                continue
-
-            # Notification from agent
-            if isinstance(msg, dict) and "method" in msg and "id" not in msg:
-                method = msg["method"]
-                params = msg.get("params") or {}
-                for h in self._notif_handlers.get(method, []) or []:
-                    try:
-                        h(params)
-                    except Exception:
-                        pass
+                msg_id = int(msg["id"])
+            except (TypeError, ValueError):
+                return  # null or non-numeric id: not one of ours
+            fut = self._pending.pop(msg_id, None)
+            # A caller that was cancelled leaves a done future behind
+            if fut is None or fut.done():
+                return
+            if "error" in msg:
+                fut.set_exception(RuntimeError(str(msg["error"])))
+            else:
+                fut.set_result(msg.get("result"))
+            return
+
+        method = msg["method"]
+        params = msg.get("params") or {}
+
+        # Request from agent (client-side); answered off the read path
+        if has_id:
+            task = asyncio.ensure_future(self._answer_request(msg["id"], method, params))
+            self._request_tasks.add(task)
+            task.add_done_callback(self._request_tasks.discard)
+            return
+
+        # Notification from agent
+        handlers = self._notif_handlers.get(method)
+        if handlers:
+            for h in handlers:
+                try:
+                    h(params)
+                except Exception:
+                    pass
+
+    async def _answer_request(self, req_id: Any, method: str, params: Dict[str, Any]) -> None:
+        send = self._send
+        handler = self._request_handlers.get(method)
+        if handler:
+            try:
+                result = await handler(params)
+                await send({"jsonrpc": "2.0", "id": req_id, "result": result})
+            except Exception as e:
+                await send({
+                    "jsonrpc": "2.0",
+                    "id": req_id,
+                    "error": {"code": -32000, "message": str(e)},
+                })
+        else:
+            await send({
+                "jsonrpc": "2.0",
+                "id": req_id,
+                "error": {"code": -32601, "message": "Method not found"},
+            })
 
     async def _send(self, obj: Dict[str, Any]) -> None:
         if not self._proc or not self._proc.stdin:
             return
-        self._proc.stdin.write((json.dumps(obj) + "\n").encode("utf-8"))
-        await self._proc.stdin.drain()
+        await self._write_frame(json_dumps_line(obj))
+
+    async def _write_frame(self, data: bytes) -> None:
+        stdin = self._proc.stdin
+        stdin.write(data)
+        # Only wait for the pipe when it is backed up, or closing so that
+        # drain() raises the connection error instead of it going unnoticed
+        if stdin.is_closing() or stdin.transport.get_write_buffer_size() > WRITE_HIGH_WATER:
+            await stdin.drain()
 
 
 class QwenCLI(BaseCLI):
@@ -227,21 +360,7 @@ class QwenCLI(BaseCLI):
     async def _ensure_client(self) -> _ACPClient:
         # Use shared client across adapter instances
         if QwenCLI._SHARED_CLIENT is None:
-            # Resolve command: env(QWEN_CMD) -> qwen -> qwen-code
-            candidates = []
-            env_cmd = os.getenv("QWEN_CMD")
-            if env_cmd:
-                candidates.append(env_cmd)
-            candidates.extend(["qwen", "qwen-code"])
-            resolved = None
-            for c in candidates:
-                if shutil.which(c):
-                    resolved = c
-                    break
-            if not resolved:
-                raise RuntimeError(
-                    "Qwen CLI not found. Set QWEN_CMD or install 'qwen' CLI in PATH."
-                )
+            resolved = _resolve_qwen_cmd(os.getenv("QWEN_CMD"))
             cmd = [resolved, "--experimental-acp"]
             # Prefer device-code / no-browser flow to avoid launching windows
             env = os.environ.copy()
@@ -312,24 +431,32 @@ class QwenCLI(BaseCLI):
             try:
                 proc = QwenCLI._SHARED_CLIENT._proc
                 if proc and proc.stderr:
+                    def _log_stderr_line(line: bytes) -> None:
+                        # Filter on raw bytes; only lines that survive are decoded
+                        if _is_stderr_noise(line):
+                            return
+                        decoded = line.strip().decode(errors="ignore")
+                        # Only log meaningful errors
+                        if decoded and not decoded.startswith("DEBUG"):
+                            ui.warning(decoded, "Qwen STDERR")
+
                     async def _log_stderr(stream):
+                        buffer = bytearray()
                         while True:
-                            line = await stream.readline()
-                            if not line:
+                            chunk = await stream.read(STDERR_CHUNK_SIZE)
+                            if not chunk:
                                 break
-                            decoded = line.decode(errors="ignore").strip()
-                            # Skip polling for token messages
-                            if "polling for token" in decoded.lower():
-                                continue
-                            # Skip ImportProcessor errors (these are just warnings about npm packages)
-                            if "[ERROR] [ImportProcessor]" in decoded:
-                                continue
-                            # Skip ENOENT errors for node_modules paths
-                            if "ENOENT" in decoded and ("node_modules" in decoded or "tailwind" in decoded or "supabase" in decoded):
-                                continue
-                            # Only log meaningful errors
-                            if decoded and not decoded.startswith("DEBUG"):
-                                ui.warning(decoded, "Qwen STDERR")
+                            buffer.extend(chunk)
+                            start = 0
+                            while True:
+                                nl = buffer.find(b"\n", start)
+                                if nl < 0:
+                                    break
+                                _log_stderr_line(bytes(buffer[start:nl]))
+                                start = nl + 1
+                            del buffer[:start]
+                        if buffer:
+                            _log_stderr_line(bytes(buffer))
                     asyncio.create_task(_log_stderr(proc.stderr))
             except Exception:
                 pass
@@ -368,7 +495,7 @@ class QwenCLI(BaseCLI):
         client = await self._ensure_client()
         # Ensure provider markdown exists in project repo
         await self._ensure_provider_md(project_path)
-        turn_id = str(uuid.uuid4())[:8]
+        turn_id = uuid.uuid4().hex[:8]
         try:
             ui.debug(
                 f"[{turn_id}] execute_with_streaming start | model={model or '-'} | images={len(images or [])} | instruction_len={len(instruction or '')}",
@@ -430,12 +557,16 @@ class QwenCLI(BaseCLI):
                         content=err,
                         metadata_json={"cli_type": self.cli_type.value},
                         session_id=session_id,
-                        created_at=datetime.utcnow(),
+                        created_at=utcnow(),
                     )
                     return
 
         # Subscribe to session/update notifications and stream as Message
-        q: asyncio.Queue = asyncio.Queue()
+        # Single producer (_on_update) and single consumer (the loop below):
+        # a deque plus a bare wakeup future, replaced after each wakeup
+        loop = asyncio.get_running_loop()
+        pending_updates: Deque[Dict[str, Any]] = deque()
+        updates_ready: asyncio.Future = loop.create_future()
         thought_buffer: List[str] = []
         text_buffer: List[str] = []
 
@@ -444,7 +575,9 @@ class QwenCLI(BaseCLI):
                 if params.get("sessionId") != stored_session_id:
                     return
                 update = params.get("update") or {}
-                q.put_nowait(update)
+                pending_updates.append(update)
+                if not updates_ready.done():
+                    updates_ready.set_result(None)
             except Exception:
                 pass
 
@@ -479,81 +612,121 @@ class QwenCLI(BaseCLI):
 
         prompt_task = _make_prompt_task()
 
+        # Chat text is normally held until a tool call or the end of the turn
+        # (message → tools → message); QWEN_CHAT_FLUSH_INTERVAL opts into
+        # flushing it mid-turn once it has been buffered that many seconds
+        flush_interval = _chat_flush_interval()
+        buffered_since: Optional[float] = None
+
         # Stream notifications until prompt completes
-        while True:
-            done, pending = await asyncio.wait(
-                {prompt_task, asyncio.create_task(q.get())},
-                return_when=asyncio.FIRST_COMPLETED,
-            )
-            if prompt_task in done:
-                ui.debug(f"[{turn_id}] prompt_task completed; draining updates", "Qwen")
-                # Flush remaining updates quickly
-                while not q.empty():
-                    update = q.get_nowait()
-                    async for m in self._update_to_messages(update, project_path, session_id, thought_buffer, text_buffer):
-                        if m:
-                            yield m
-                # Handle prompt exception (e.g., session not found) with one retry
-                exc = prompt_task.exception()
-                if exc:
-                    msg = str(exc)
-                    if "Session not found" in msg or "session not found" in msg.lower():
-                        ui.warning("Qwen session expired; creating a new session and retrying", "Qwen")
-                        try:
-                            result = await client.request(
-                                "session/new", {"cwd": project_repo_path, "mcpServers": []}
+        try:
+            while True:
+                done, _ = await asyncio.wait(
+                    {prompt_task, updates_ready},
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                if updates_ready in done:
+                    # Re-arm before draining so an append made while we yield
+                    # below resolves the new future rather than being missed
+                    updates_ready = loop.create_future()
+                    while pending_updates:
+                        update = pending_updates.popleft()
+                        # Suppress verbose per-chunk logs; log only tool calls below
+                        for m in self._update_to_messages(update, project_path, session_id, thought_buffer, text_buffer):
+                            if m:
+                                yield m
+                    if not (thought_buffer or text_buffer):
+                        buffered_since = None
+                    elif flush_interval:
+                        now_mono = time.monotonic()
+                        if buffered_since is None:
+                            buffered_since = now_mono
+                        # Flush only at a line end so call_* line filtering still sees whole lines
+                        elif (
+                            text_buffer
+                            and now_mono - buffered_since >= flush_interval
+                            and text_buffer[-1].endswith("\n")
+                        ):
+                            yield Message(
+                                id=str(uuid.uuid4()),
+                                project_id=project_path,
+                                role="assistant",
+                                message_type="chat",
+                                content=self._compose_content(thought_buffer, text_buffer),
+                                metadata_json={"cli_type": self.cli_type.value, "partial": True},
+                                session_id=session_id,
+                                created_at=utcnow(),
                             )
-                            stored_session_id = result.get("sessionId")
-                            if stored_session_id:
-                                await self.set_session_id(project_id, stored_session_id)
-                                prompt_task = _make_prompt_task()
-                                continue  # re-enter wait loop
-                        except Exception as e2:
+                            thought_buffer.clear()
+                            text_buffer.clear()
+                            buffered_since = None
+                if prompt_task in done:
+                    ui.debug(f"[{turn_id}] prompt_task completed; draining updates", "Qwen")
+                    # Flush remaining updates quickly
+                    while pending_updates:
+                        update = pending_updates.popleft()
+                        for m in self._update_to_messages(update, project_path, session_id, thought_buffer, text_buffer):
+                            if m:
+                                yield m
+                    # One timestamp for the error and final flush messages below
+                    now = utcnow()
+                    # Handle prompt exception (e.g., session not found) with one retry
+                    exc = prompt_task.exception()
+                    if exc:
+                        msg = str(exc)
+                        if "Session not found" in msg or "session not found" in msg.lower():
+                            ui.warning("Qwen session expired; creating a new session and retrying", "Qwen")
+                            try:
+                                result = await client.request(
+                                    "session/new", {"cwd": project_repo_path, "mcpServers": []}
+                                )
+                                stored_session_id = result.get("sessionId")
+                                if stored_session_id:
+                                    await self.set_session_id(project_id, stored_session_id)
+                                    prompt_task = _make_prompt_task()
+                                    continue  # re-enter wait loop
+                            except Exception as e2:
+                                yield Message(
+                                    id=str(uuid.uuid4()),
+                                    project_id=project_path,
+                                    role="assistant",
+                                    message_type="error",
+                                    content=f"Qwen session recovery failed: {e2}",
+                                    metadata_json={"cli_type": self.cli_type.value},
+                                    session_id=session_id,
+                                    created_at=now,
+                                )
+                        else:
                             yield Message(
                                 id=str(uuid.uuid4()),
                                 project_id=project_path,
                                 role="assistant",
                                 message_type="error",
-                                content=f"Qwen session recovery failed: {e2}",
+                                content=f"Qwen prompt error: {msg}",
                                 metadata_json={"cli_type": self.cli_type.value},
                                 session_id=session_id,
-                                created_at=datetime.utcnow(),
+                                created_at=now,
                             )
-                    else:
+                    # Final flush of buffered assistant text
+                    if thought_buffer or text_buffer:
                         yield Message(
                             id=str(uuid.uuid4()),
                             project_id=project_path,
                             role="assistant",
-                            message_type="error",
-                            content=f"Qwen prompt error: {msg}",
+                            message_type="chat",
+                            content=self._compose_content(thought_buffer, text_buffer),
                             metadata_json={"cli_type": self.cli_type.value},
                             session_id=session_id,
-                            created_at=datetime.utcnow(),
+                            created_at=now,
                         )
-                # Final flush of buffered assistant text
-                if thought_buffer or text_buffer:
-                    yield Message(
-                        id=str(uuid.uuid4()),
-                        project_id=project_path,
-                        role="assistant",
-                        message_type="chat",
-                        content=self._compose_content(thought_buffer, text_buffer),
-                        metadata_json={"cli_type": self.cli_type.value},
-                        session_id=session_id,
-                        created_at=datetime.utcnow(),
-                    )
-                    thought_buffer.clear()
-                    text_buffer.clear()
-                break
+                        thought_buffer.clear()
+                        text_buffer.clear()
+                    break
 
-            # Process one update
-            for task in done:
-                if task is not prompt_task:
-                    update = task.result()
-                    # Suppress verbose per-chunk logs; log only tool calls below
-                    async for m in self._update_to_messages(update, project_path, session_id, thought_buffer, text_buffer):
-                        if m:
-                            yield m
+        finally:
+            updates_ready.cancel()
+            # The client is shared; drop this turn's handler so they don't pile up
+            client.off_notification("session/update", _on_update)
 
         # Yield hidden result/system message for bookkeeping
         yield Message(
@@ -564,20 +737,21 @@ class QwenCLI(BaseCLI):
             content="Qwen turn completed",
             metadata_json={"cli_type": self.cli_type.value, "hidden_from_ui": True},
             session_id=session_id,
-            created_at=datetime.utcnow(),
+            created_at=utcnow(),
         )
         ui.info(f"[{turn_id}] turn completed", "Qwen")
 
-    async def _update_to_messages(
+    def _update_to_messages(
         self,
         update: Dict[str, Any],
         project_path: str,
         session_id: Optional[str],
         thought_buffer: List[str],
         text_buffer: List[str],
-    ) -> AsyncGenerator[Optional[Message], None]:
+    ) -> Iterator[Optional[Message]]:
+        # Plain generator: building messages never awaits
         kind = update.get("sessionUpdate") or update.get("type")
-        now = datetime.utcnow()
+        now = utcnow()
         if kind in ("agent_message_chunk", "agent_thought_chunk"):
             text = ((update.get("content") or {}).get("text")) or update.get("text") or ""
             if not isinstance(text, str):
@@ -597,21 +771,15 @@ class QwenCLI(BaseCLI):
                 return
 
             tool_name = self._parse_tool_name(update)
+            # Suppress unknown/opaque tool names that fall back to "executing...",
+            # before spending anything on their input or summary
+            tn = tool_name.lower() if isinstance(tool_name, str) else ""
+            if tn in _OPAQUE_TOOL_NAMES or tn.startswith(_OPAQUE_TOOL_PREFIXES):
+                return
             tool_input = self._extract_tool_input(update)
             summary = self._create_tool_summary(tool_name, tool_input)
-
-            # Suppress unknown/opaque tool names that fall back to "executing..."
-            try:
-                tn = (tool_name or "").lower()
-                is_opaque = (
-                    tn in ("call", "tool", "toolcall")
-                    or tn.startswith("call_")
-                    or tn.startswith("call-")
-                )
-                if is_opaque or summary.strip().endswith("`executing...`"):
-                    return
-            except Exception:
-                pass
+            if summary.rstrip().endswith("`executing...`"):
+                return
 
             # Flush chat buffer before showing tool usage
             if thought_buffer or text_buffer:
@@ -691,20 +859,19 @@ class QwenCLI(BaseCLI):
 
     def _compose_content(self, thought_buffer: List[str], text_buffer: List[str]) -> str:
         # Qwen formatting per result_qwen.md: merge thoughts + text, and filter noisy call_* lines
-        import re
-        parts: List[str] = []
-        if thought_buffer:
-            parts.append("".join(thought_buffer))
-            if text_buffer:
-                parts.append("\n\n")
-        if text_buffer:
-            parts.append("".join(text_buffer))
-        combined = "".join(parts)
-        # Remove lines like: call_XXXXXXXX executing... (Qwen internal call IDs)
-        combined = re.sub(r"(?m)^call[_-][A-Za-z0-9]+.*$\n?", "", combined)
+        combined = (
+            "".join(thought_buffer)
+            + ("\n\n" if thought_buffer and text_buffer else "")
+            + "".join(text_buffer)
+        )
+        # Remove lines like: call_XXXXXXXX executing... (Qwen internal call IDs).
+        # Plain substring checks skip the regex scans for text that can't match
+        if "call" in combined:
+            combined = _CALL_ID_LINE_RE.sub("", combined)
         # Trim excessive blank lines
-        combined = re.sub(r"\n{3,}", "\n\n", combined).strip()
-        return combined
+        if "\n\n\n" in combined:
+            combined = _EXCESS_BLANK_LINES_RE.sub("\n\n", combined)
+        return combined.strip()
 
     def _parse_tool_name(self, update: Dict[str, Any]) -> str:
         # Prefer explicit kind from Qwen events
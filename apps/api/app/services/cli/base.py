@@ -9,10 +9,12 @@ from __future__ import annotations
 import os
 import uuid
 from abc import ABC, abstractmethod
-from datetime import datetime
+from datetime import datetime, timezone
 from enum import Enum
+from functools import lru_cache
 from typing import Any, AsyncGenerator, Callable, Dict, List, Optional
 
+from app.core.terminal_ui import ui
 from app.models.messages import Message
 
 
@@ -45,6 +47,50 @@ def get_display_path(file_path: str) -> str:
     return file_path
 
 
+# this file is in: app/services/cli/
+# go up to app/: cli -> services -> app
+_APP_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+_SYSTEM_PROMPT_PATH = os.path.join(_APP_DIR, "prompt", "system-prompt.md")
+
+
+@lru_cache(maxsize=1)
+def load_system_prompt() -> Optional[bytes]:
+    """Read the bundled system prompt bytes once per process; None if missing"""
+    try:
+        with open(_SYSTEM_PROMPT_PATH, "rb") as f:
+            return f.read()
+    except FileNotFoundError:
+        ui.warning(f"System prompt file not found at: {_SYSTEM_PROMPT_PATH}", "CLI")
+        return None
+
+
+_TRUTHY = frozenset({"1", "true", "yes", "on"})
+
+
+@lru_cache(maxsize=None)
+def env_flag(name: str) -> bool:
+    """Parse a boolean env toggle once per process"""
+    return os.environ.get(name, "").lower() in _TRUTHY
+
+
+def utcnow() -> datetime:
+    """Naive UTC now, matching Message.created_at; datetime.utcnow() is deprecated"""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def get_project_id_from_path(project_path: str) -> str:
+    """Return the project id from a .../projects/{project_id}[/repo] path.
+
+    Only the last one or two components are inspected, scanning from the
+    right with rpartition, so no list of path parts is built.
+    """
+    head, _, tail = project_path.rstrip("/").rpartition("/")
+    if tail == "repo" and head:
+        # Get the folder before "repo"
+        return head.rpartition("/")[2]
+    return tail or project_path
+
+
 # Model mapping from unified names to CLI-specific names
 MODEL_MAPPING: Dict[str, Dict[str, str]] = {
     "claude": {
@@ -251,7 +297,7 @@ class BaseCLI(ABC):
                 "original_format": data,
             },
             session_id=session_id,
-            created_at=datetime.utcnow(),
+            created_at=utcnow(),
         )
 
     def _normalize_role(self, role: str) -> str:
@@ -130,9 +130,14 @@ class UnifiedCLIManager:
                 original_event = message.metadata_json.get("original_event", {})
 
                 if event_type == "result" or original_event.get("type") == "result":
-                    # Cursor sends result event with success/error status
-                    is_error = original_event.get("is_error", False)
-                    subtype = original_event.get("subtype", "")
+                    # Cursor sends result event with success/error status; the
+                    # adapter copies it into metadata, the raw event is debug-only
+                    is_error = message.metadata_json.get(
+                        "is_error", original_event.get("is_error", False)
+                    )
+                    subtype = message.metadata_json.get(
+                        "subtype", original_event.get("subtype", "")
+                    )
 
                     # DEBUG: Log the complete result event structure
                     ui.info(f"🔍 [Cursor] Result event received:", "DEBUG")
@@ -30,7 +30,8 @@ class CLISessionManager:
         
         session_mapping = {
             CLIType.CLAUDE: project.active_claude_session_id,
-            CLIType.CURSOR: project.active_cursor_session_id
+            CLIType.CURSOR: project.active_cursor_session_id,
+            CLIType.CODEX: project.codex_session_id
         }
         
         session_id = session_mapping.get(cli_type)
@@ -51,7 +52,8 @@ class CLISessionManager:
         # Update database
         update_mapping = {
             CLIType.CLAUDE: {"active_claude_session_id": session_id},
-            CLIType.CURSOR: {"active_cursor_session_id": session_id}
+            CLIType.CURSOR: {"active_cursor_session_id": session_id},
+            CLIType.CODEX: {"codex_session_id": session_id}
         }
         
         update_data = update_mapping.get(cli_type)
@@ -68,11 +70,19 @@ class CLISessionManager:
         if project_id not in self._session_cache:
             self._session_cache[project_id] = {}
         self._session_cache[project_id][cli_type] = session_id
+        if cli_type == CLIType.CURSOR:
+            self._forget_gemini_session(project_id)
         
         from app.core.terminal_ui import ui
         ui.success(f"Set {cli_type.value} session ID for project {project_id}: {session_id}", "Session")
         return True
     
+    @staticmethod
+    def _forget_gemini_session(project_id: str) -> None:
+        """Gemini keeps its id inside active_cursor_session_id; evict its cached copy"""
+        from app.services.cli.adapters.gemini_cli import GeminiCLI
+        GeminiCLI.forget_session(project_id)
+    
     def get_all_sessions(self, project_id: str) -> Dict[str, Optional[str]]:
         """Get all CLI session IDs for a project"""
         project = self.db.get(Project, project_id)
@@ -81,7 +91,8 @@ class CLISessionManager:
         
         return {
             "claude": project.active_claude_session_id,
-            "cursor": project.active_cursor_session_id
+            "cursor": project.active_cursor_session_id,
+            "codex": project.codex_session_id
         }
     
     def clear_session_id(self, project_id: str, cli_type: CLIType) -> bool:
@@ -96,12 +107,15 @@ class CLISessionManager:
         
         project.active_claude_session_id = None
         project.active_cursor_session_id = None
+        project.codex_session_id = None
+        project.codex_rollout_path = None
         
         self.db.commit()
         
         # Clear cache
         if project_id in self._session_cache:
             del self._session_cache[project_id]
+        self._forget_gemini_session(project_id)
         
         from app.core.terminal_ui import ui
         ui.info(f"Cleared all CLI sessions for project {project_id}", "Session")